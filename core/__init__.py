@@ -4,6 +4,7 @@ __all__ = [
     "bootstrap",
     "com_ports",
     "device_models",
+    "json_codec",
     "scanners",
     "usb_ids",
 ]
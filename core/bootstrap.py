@@ -2,12 +2,22 @@
 
 from __future__ import annotations
 
+import logging
 import sys
 from typing import List, Optional, Tuple
 
 from .device_models import UsbDeviceSnapshot, UsbSnapshotRepository, UsbSnapshotService
 from .scanners import DeviceScanner
 
+logger = logging.getLogger(__name__)
+
+
+def build_services(usb_json_path: str, *, ble_timeout: float = 5.0) -> UsbSnapshotService:
+    """スキャナ・リポジトリ・サービスを組み立てる（スキャンは行わない）。"""
+    scanner = DeviceScanner(ble_timeout=ble_timeout)
+    repository = UsbSnapshotRepository(usb_json_path)
+    return UsbSnapshotService(scanner, repository)
+
 
 def setup_services(
     usb_json_path: str,
@@ -15,13 +25,11 @@ def setup_services(
     ble_timeout: float = 5.0,
 ) -> Tuple[UsbSnapshotService, List[UsbDeviceSnapshot], Optional[str]]:
     """スキャナ・リポジトリ・サービスを組み立て、最新スナップショットを取得する。"""
-    scanner = DeviceScanner(ble_timeout=ble_timeout)
-    repository = UsbSnapshotRepository(usb_json_path)
-    service = UsbSnapshotService(scanner, repository)
+    service = build_services(usb_json_path, ble_timeout=ble_timeout)
     snapshots, scan_error = service.refresh()
-    print(f"[DEBUG] scan() snapshots count: {len(snapshots)}")
+    logger.debug("scan() snapshots count: %d", len(snapshots))
     if not snapshots:
-        print("[DEBUG] USBデバイスが1つも取得できませんでした")
+        logger.debug("USBデバイスが1つも取得できませんでした")
     if scan_error:
         print(scan_error, file=sys.stderr)
     return service, snapshots, scan_error
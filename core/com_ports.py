@@ -2,9 +2,47 @@
 
 from __future__ import annotations
 
+import logging
 import platform
 import sys
-from typing import Dict, List, Optional
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 直近の列挙結果（WindowsではWMIクエリが数百ms〜1秒以上かかるため、ttl指定時に使い回す）
+_COM_PORTS_CACHE: Dict[str, object] = {"system": None, "t": 0.0, "v": ()}
+_COM_PORTS_LOCK = threading.Lock()
+
+
+def _wmi_port_to_dict(device: Any) -> Dict[str, Optional[str]]:
+    # COMオブジェクトのプロパティ取得はプロセス間呼び出しになるため1回ずつに抑える
+    name = device.Name
+    return {
+        "device": name.split()[-1].replace("(", "").replace(")", "") if name else None,
+        "description": name,
+        "pnp_id": device.PNPDeviceID,
+        "vid": None,
+        "pid": None,
+        "serial_number": None,
+        "manufacturer": None,
+        "product": None,
+    }
+
+
+def _serial_port_to_dict(port: Any) -> Dict[str, Optional[str]]:
+    # 呼び出し側でvid/pidがNoneでないことを確認済み
+    return {
+        "device": port.device,
+        "description": port.description,
+        "hwid": port.hwid,
+        "vid": hex(port.vid),
+        "pid": hex(port.pid),
+        "serial_number": getattr(port, "serial_number", None),
+        "manufacturer": getattr(port, "manufacturer", None),
+        "product": getattr(port, "product", None),
+    }
 
 
 class ComPortManager:
@@ -56,64 +94,63 @@ class ComPortManager:
         return False
 
     @staticmethod
-    def get_com_ports() -> List[Dict[str, Optional[str]]]:
-        """Windows/macOS/Linuxのシリアルポートを列挙する。"""
+    def get_com_ports(ttl: float = 0.0) -> List[Dict[str, Optional[str]]]:
+        """Windows/macOS/Linuxのシリアルポートを列挙する。
+
+        既定では常に再列挙する。`ttl` に正の秒数を渡すと、その秒数以内の前回結果を返す。
+        呼び出し側がリストを変更してもキャッシュに影響しないよう、常に新しいリストを返す。
+        """
 
         system = platform.system()
+        now = time.monotonic()
+        with _COM_PORTS_LOCK:
+            if (
+                ttl > 0
+                and _COM_PORTS_CACHE["system"] == system
+                and now - _COM_PORTS_CACHE["t"] < ttl  # type: ignore[operator]
+            ):
+                return list(_COM_PORTS_CACHE["v"])  # type: ignore[call-overload]
+        com_ports = ComPortManager._enumerate_com_ports(system)
+        with _COM_PORTS_LOCK:
+            _COM_PORTS_CACHE.update(system=system, t=time.monotonic(), v=tuple(com_ports))
+        return com_ports
+
+    @staticmethod
+    def _enumerate_com_ports(system: str) -> List[Dict[str, Optional[str]]]:
         com_ports: List[Dict[str, Optional[str]]] = []
         if system == "Windows":
             try:
                 import win32com.client  # type: ignore
 
                 wmi = win32com.client.Dispatch("WbemScripting.SWbemLocator")
-                for device in wmi.ConnectServer(".", "root\\cimv2").ExecQuery(
-                    "SELECT * FROM Win32_PnPEntity WHERE Name LIKE '%(COM%'"
-                ):
-                    com_ports.append(
-                        {
-                            "device": device.Name.split()[-1].replace("(", "").replace(")", "")
-                            if device.Name
-                            else None,
-                            "description": device.Name,
-                            "pnp_id": device.PNPDeviceID,
-                            "vid": None,
-                            "pid": None,
-                            "serial_number": None,
-                            "manufacturer": None,
-                            "product": None,
-                        }
-                    )
+                query = wmi.ConnectServer(".", "root\\cimv2").ExecQuery(
+                    "SELECT Name, PNPDeviceID FROM Win32_PnPEntity WHERE Name LIKE '%(COM%'"
+                )
+                for device in query:
+                    com_ports.append(_wmi_port_to_dict(device))
             except Exception as exc:  # pragma: no cover - platform specific
-                print(f"COMポート情報取得エラー(Windows): {exc}", file=sys.stderr)
+                logger.warning("COMポート情報取得エラー(Windows): %s", exc)
         else:
             try:
                 import serial.tools.list_ports as list_ports  # type: ignore
             except ImportError:
                 print("pyserialが必要です。pip install pyserial を実行してください。", file=sys.stderr)
                 return []
-            for port in list_ports.comports():
-                if getattr(port, "vid", None) is not None and getattr(port, "pid", None) is not None:
-                    com_ports.append(
-                        {
-                            "device": port.device,
-                            "description": port.description,
-                            "hwid": port.hwid,
-                            "vid": hex(port.vid) if port.vid is not None else None,
-                            "pid": hex(port.pid) if port.pid is not None else None,
-                            "serial_number": getattr(port, "serial_number", None),
-                            "manufacturer": getattr(port, "manufacturer", None),
-                            "product": getattr(port, "product", None),
-                        }
-                    )
+            com_ports = [
+                _serial_port_to_dict(port)
+                for port in list_ports.comports()
+                if getattr(port, "vid", None) is not None and getattr(port, "pid", None) is not None
+            ]
         return com_ports
 
     @classmethod
     def get_com_ports_cached(cls, force_refresh: bool = False) -> List[Dict[str, Optional[str]]]:
         """キャッシュ済みのシリアルポート列挙結果を返す。"""
 
+        # このクラス側で保持するので、モジュールのTTLキャッシュは重ねずに列挙し直す
         if force_refresh or cls._ports_cache is None:
-            cls._ports_cache = cls.get_com_ports()
-        return cls._ports_cache
+            cls._ports_cache = cls.get_com_ports(0.0)
+        return list(cls._ports_cache)
 
     @staticmethod
     def filter_ports(
@@ -124,16 +161,14 @@ class ComPortManager:
     ) -> List[Dict[str, Optional[str]]]:
         """VID/PID/シリアル番号でポート一覧を絞り込む。"""
 
-        results: List[Dict[str, Optional[str]]] = []
-        for port in ports:
-            if vid and port.get("vid") != vid:
-                continue
-            if pid and port.get("pid") != pid:
-                continue
-            if serial and port.get("serial_number") != serial:
-                continue
-            results.append(port)
-        return results
+        wanted = tuple(
+            (field, value)
+            for field, value in (("vid", vid), ("pid", pid), ("serial_number", serial))
+            if value
+        )
+        if not wanted:
+            return list(ports)
+        return [port for port in ports if all(port.get(field) == value for field, value in wanted)]
 
     @staticmethod
     def format_port_name(port_name: Optional[str]) -> str:
@@ -151,4 +186,4 @@ class ComPortManager:
 
         if not port_name:
             return False
-        return any(port.get("device") == port_name for port in ComPortManager.get_com_ports())
+        return any(port.get("device") == port_name for port in ComPortManager.get_com_ports(ttl=0.0))
@@ -2,16 +2,25 @@
 
 from __future__ import annotations
 
-import json
+import hashlib
 import os
+import stat
 import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING, Union
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, TYPE_CHECKING, Union
 
+from . import json_codec
 from .com_ports import ComPortManager
 
 if TYPE_CHECKING:  # pragma: no cover - 循環参照回避の型ヒントのみ
-    from usb_util_gui import UsbIdsDatabase  # type: ignore
+    from .usb_ids import UsbIdsDatabase
+
+
+# (VID, PID) -> ポート名 と (VID, PID, シリアル) -> ポート名 の組
+_PortIndex = Tuple[Dict[Tuple[str, str], Optional[str]], Dict[Tuple[str, str, str], Optional[str]]]
 
 
 @dataclass
@@ -39,6 +48,24 @@ class UsbDeviceSnapshot:
     ble_name: str = ""
     ble_rssi: Optional[int] = None
     ble_uuids: List[str] = field(default_factory=list)
+    vid_norm: str = field(init=False, repr=False, compare=False)
+    pid_norm: str = field(init=False, repr=False, compare=False)
+    serial_norm: str = field(init=False, repr=False, compare=False)
+    _identity: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _resolved: Optional[Tuple["UsbIdsDatabase", Tuple[str, str]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        # 照合ループで毎回正規化しないよう、構築時に一度だけ正規形を保持する
+        self.vid_norm = sys.intern(_normalize_hex(self.vid))
+        self.pid_norm = sys.intern(_normalize_hex(self.pid))
+        self.serial_norm = _normalize_serial(self.serial)
+
+    @staticmethod
+    def normalize_ids(vid: Any, pid: Any, serial: Any = None) -> Tuple[str, str, str]:
+        """VID/PID/シリアルを vid_norm/pid_norm/serial_norm と同じ形に正規化して返す。"""
+        return _normalize_hex(vid), _normalize_hex(pid), _normalize_serial(serial)
 
     def key(self) -> str:
         """VID/PIDの正規キーを返す。"""
@@ -48,7 +75,12 @@ class UsbDeviceSnapshot:
         return f"{self.vid}:{self.pid}"
 
     def identity(self) -> str:
-        """同一デバイスを区別するための識別子を返す。"""
+        """同一デバイスを区別するための識別子を返す（初回計算後はキャッシュ）。"""
+        if self._identity is None:
+            self._identity = self._build_identity()
+        return self._identity
+
+    def _build_identity(self) -> str:
         if self.device_type == "ble":
             parts: List[str] = []
             if self.ble_address:
@@ -77,7 +109,15 @@ class UsbDeviceSnapshot:
         return " | ".join(parts)
 
     def resolve_names(self, ids_db: "UsbIdsDatabase") -> Tuple[str, str]:
-        """usb.idsからベンダー/製品名を解決する。"""
+        """usb.idsからベンダー/製品名を解決する（同じDBに対する結果はキャッシュ）。"""
+        resolved = self._resolved
+        if resolved is not None and resolved[0] is ids_db:
+            return resolved[1]
+        names = self._resolve_names(ids_db)
+        self._resolved = (ids_db, names)
+        return names
+
+    def _resolve_names(self, ids_db: "UsbIdsDatabase") -> Tuple[str, str]:
         if self.device_type == "ble":
             return "―", "―"
         if self.error:
@@ -146,20 +186,71 @@ class UsbDeviceSnapshot:
         )
 
 
+@dataclass(frozen=True, slots=True)
+class DeviceConnection:
+    """スナップショットと対応COMポートの照合結果。
+
+    従来の辞書形式の呼び出し側のため、``entry["com_port"]`` や ``entry.get("serial")`` でも参照できる。
+    """
+
+    snapshot: UsbDeviceSnapshot
+    identity: str
+    serial: str
+    com_port: Optional[str]
+    port_path: Tuple[int, ...]
+    bus: Optional[int]
+    address: Optional[int]
+
+    _KEYS: ClassVar[Tuple[str, ...]] = (
+        "snapshot",
+        "identity",
+        "serial",
+        "com_port",
+        "port_path",
+        "bus",
+        "address",
+    )
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._KEYS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """辞書の get と同様に値を返す（未知のキーは default）。"""
+        return getattr(self, key) if key in self._KEYS else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._KEYS
+
+    def as_dict(self) -> Dict[str, Any]:
+        """従来の辞書形式へ変換する（port_path はリストに戻す）。"""
+        data = {key: getattr(self, key) for key in self._KEYS}
+        data["port_path"] = list(self.port_path)
+        return data
+
+
 class UsbSnapshotRepository:
     """USB/BTデバイススナップショットのJSON保存を扱う。"""
 
     def __init__(self, json_path: str) -> None:
         self.json_path = json_path
+        # 直近に読み書きしたファイル内容のダイジェストと、その時点の (st_mtime_ns, st_size)
+        self._last_written: Optional[Tuple[bytes, Tuple[int, int]]] = None
 
     def load(self) -> List[UsbDeviceSnapshot]:
         """JSONストレージからスナップショットを読み込む。"""
         if not os.path.exists(self.json_path):
             return [self.placeholder("USB/BTデバイス情報が存在しません")]
         try:
-            with open(self.json_path, "r", encoding="utf-8") as infile:
-                data = json.load(infile)
-        except (OSError, json.JSONDecodeError):
+            with open(self.json_path, "rb") as infile:
+                raw = infile.read()
+                self._remember(raw, os.fstat(infile.fileno()))
+            data = json_codec.loads(raw)
+        except (OSError, ValueError):
             return [self.placeholder("USB/BTデバイス情報の読み込みに失敗しました")]
         if isinstance(data, dict):
             data = [data]
@@ -168,17 +259,63 @@ class UsbSnapshotRepository:
         return [UsbDeviceSnapshot.from_dict(item) for item in data]
 
     def save(self, snapshots: List[UsbDeviceSnapshot]) -> None:
-        """JSONストレージへスナップショットを保存する。"""
+        """JSONストレージへスナップショットを保存する（内容が前回と同じなら書き込まない）。"""
+        payload = self._encode(snapshots)
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+        if self._is_unchanged(digest):
+            return
+        tmp_path = None
         try:
-            with open(self.json_path, "w", encoding="utf-8") as outfile:
-                json.dump(
-                    [snapshot.to_dict() for snapshot in snapshots],
-                    outfile,
-                    ensure_ascii=False,
-                    indent=2,
-                )
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=os.path.dirname(self.json_path) or None, suffix=".tmp", delete=False
+            ) as outfile:
+                tmp_path = outfile.name
+                outfile.write(payload)
+            # 一時ファイルは0600で作られるので、既存ファイル(無ければ通常の0644)の権限に揃える
+            os.chmod(tmp_path, self._file_mode())
+            os.replace(tmp_path, self.json_path)
+            self._last_written = (digest, self._stat_key(os.stat(self.json_path)))
         except OSError as exc:
             print(f"USB/BT情報の書き込みに失敗しました: {exc}", file=sys.stderr)
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _encode(snapshots: List[UsbDeviceSnapshot]) -> bytes:
+        # 全件の辞書リストを作らず、1件ずつUTF-8のまま連結する（出力形式は indent=2 と同一）
+        chunks: List[bytes] = [b"["]
+        for index, snapshot in enumerate(snapshots):
+            chunks.append(b",\n  " if index else b"\n  ")
+            data = json_codec.dumps_pretty_bytes(snapshot.to_dict())
+            chunks.append(data.replace(b"\n", b"\n  "))
+        chunks.append(b"\n]" if snapshots else b"]")
+        return b"".join(chunks)
+
+    def _remember(self, payload: bytes, file_stat: os.stat_result) -> None:
+        self._last_written = (hashlib.blake2b(payload, digest_size=16).digest(), self._stat_key(file_stat))
+
+    def _is_unchanged(self, digest: bytes) -> bool:
+        """ディスク上のファイルが前回の読み書きから変わらず、内容も同じならTrue。"""
+        if self._last_written is None or self._last_written[0] != digest:
+            return False
+        try:
+            file_stat = os.stat(self.json_path)
+        except OSError:
+            return False
+        return self._stat_key(file_stat) == self._last_written[1]
+
+    def _file_mode(self) -> int:
+        try:
+            return stat.S_IMODE(os.stat(self.json_path).st_mode)
+        except OSError:
+            return 0o644
+
+    @staticmethod
+    def _stat_key(file_stat: os.stat_result) -> Tuple[int, int]:
+        return file_stat.st_mtime_ns, file_stat.st_size
 
     @staticmethod
     def placeholder(message: str) -> UsbDeviceSnapshot:
@@ -192,21 +329,60 @@ class UsbSnapshotService:
     def __init__(self, scanner: "DeviceScanner", repository: UsbSnapshotRepository) -> None:
         self._scanner = scanner
         self._repository = repository
+        self._ports_cache: Optional[Tuple[float, List[Dict[str, Optional[str]]]]] = None
+        self._ports_ttl = 0.5
+        # (元のポート一覧, 索引)。ポート一覧が差し替わったら作り直す
+        self._port_index: Optional[Tuple[List[Dict[str, Optional[str]]], _PortIndex]] = None
 
     def refresh(self) -> Tuple[List[UsbDeviceSnapshot], Optional[str]]:
-        """USB/BLEデバイスをスキャンし、保存して (snapshots, error) を返す。"""
-        snapshots, scan_error = self._scanner.scan()
+        """USB/BLEデバイスをスキャンし、成功時は保存して (snapshots, error) を返す。
+
+        Windowsのトポロジー対応表とCOMポート列挙はスキャンと並行して取得する。
+        """
+        from .scanners import (
+            annotate_windows_topology,
+            build_windows_topology_mapping,
+            run_in_com_apartment,
+        )
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            topology_future = executor.submit(run_in_com_apartment, build_windows_topology_mapping)
+            ports_future = executor.submit(run_in_com_apartment, ComPortManager.get_com_ports, 0.0)
+            # GUIはワーカースレッドからrefreshするので、WMIを使うスキャン本体もCOMを初期化して実行する
+            snapshots, scan_error = run_in_com_apartment(self._scanner.scan)
+            topology_mapping = topology_future.result()
+            ports = ports_future.result()
+
         if not snapshots:
             placeholder_message = scan_error or "USB/BTデバイスが見つかりません"
             snapshots = [self._repository.placeholder(placeholder_message)]
         usb_snapshots = [snap for snap in snapshots if snap.device_type == "usb"]
         if usb_snapshots:
-            from .scanners import annotate_windows_topology
-
-            annotate_windows_topology(usb_snapshots)
-        self._repository.save(snapshots)
+            annotate_windows_topology(usb_snapshots, topology_mapping)
+        # スキャン自体が失敗したときだけ、保存済みの結果を残す。
+        # デバイスが0件になった正常なスキャンは、その状態（プレースホルダー）を保存する
+        if scan_error is None:
+            self._repository.save(snapshots)
+        self._ports_cache = (time.monotonic(), ports)
         return snapshots, scan_error
 
+    def invalidate_port_cache(self) -> None:
+        """COMポート列挙キャッシュを破棄する（ホットプラグ検知時などに利用）。"""
+        self._ports_cache = None
+        self._port_index = None
+
+    def _get_com_ports_cached(self) -> List[Dict[str, Optional[str]]]:
+        """TTL内であれば直近のCOMポート列挙結果を再利用する。"""
+        now = time.monotonic()
+        if self._ports_cache is not None:
+            cached_at, ports = self._ports_cache
+            if now - cached_at < self._ports_ttl:
+                return ports
+        # TTLはここで管理するので、ComPortManager側のキャッシュは通さずに列挙する
+        ports = ComPortManager.get_com_ports(0.0)
+        self._ports_cache = (now, ports)
+        return ports
+
     def load(self) -> List[UsbDeviceSnapshot]:
         """永続化ストレージからスナップショットを読み込む。"""
         return self._repository.load()
@@ -233,9 +409,7 @@ class UsbSnapshotService:
         else:
             snapshots = self.load()
 
-        target_vid = _normalize_hex(vid)
-        target_pid = _normalize_hex(pid)
-        target_serial = _normalize_serial(serial)
+        target_vid, target_pid, target_serial = UsbDeviceSnapshot.normalize_ids(vid, pid, serial)
 
         matches: List[UsbDeviceSnapshot] = []
         for snapshot in snapshots:
@@ -243,12 +417,11 @@ class UsbSnapshotService:
                 continue
             if snapshot.device_type != "usb":
                 continue
-            if _normalize_hex(snapshot.vid) != target_vid:
+            if snapshot.vid_norm != target_vid:
                 continue
-            if _normalize_hex(snapshot.pid) != target_pid:
+            if snapshot.pid_norm != target_pid:
                 continue
-            serial_value = _normalize_serial(snapshot.serial)
-            if target_serial and serial_value != target_serial:
+            if target_serial and snapshot.serial_norm != target_serial:
                 continue
             matches.append(snapshot)
         return matches
@@ -260,26 +433,16 @@ class UsbSnapshotService:
         serial: Optional[str] = None,
         *,
         refresh: bool = False,
-    ) -> List[dict]:
+    ) -> List[DeviceConnection]:
         """デバイス情報に関連COMポートを付与して返す。"""
         snapshots = self.find_snapshots(vid, pid, serial, refresh=refresh)
-        ports = ComPortManager.get_com_ports()
-        results: List[dict] = []
+        port_index = self._get_port_index()
+        results: List[DeviceConnection] = []
         for snapshot in snapshots:
             if snapshot.device_type != "usb":
                 continue
-            com_port = self._match_com_port(snapshot, ports)
-            results.append(
-                {
-                    "snapshot": snapshot,
-                    "identity": snapshot.identity(),
-                    "serial": snapshot.serial,
-                    "com_port": com_port,
-                    "port_path": list(snapshot.port_path),
-                    "bus": snapshot.bus,
-                    "address": snapshot.address,
-                }
-            )
+            com_port = self._match_com_port(snapshot, port_index)
+            results.append(self._connection_entry(snapshot, com_port))
         return results
 
     def send_serial_command(
@@ -312,22 +475,7 @@ class UsbSnapshotService:
         except ImportError as exc:
             raise RuntimeError("pyserialが必要です。pip install pyserial を実行してください。") from exc
 
-        connections = self.find_device_connections(vid, pid, serial, refresh=refresh)
-        if not connections:
-            raise RuntimeError("指定されたVID/PIDに一致するデバイスが見つかりません。")
-
-        candidates = [entry for entry in connections if entry.get("com_port")]
-        if not candidates:
-            raise RuntimeError("一致するデバイスは見つかったものの、COMポートを検出できませんでした。")
-        if len(candidates) > 1 and serial is None:
-            raise RuntimeError(
-                "複数の一致するCOMポートが見つかりました。シリアル番号を指定して絞り込んでください。"
-            )
-
-        target = candidates[0]
-        port_name = target.get("com_port")
-        if not port_name:
-            raise RuntimeError("COMポート情報を取得できませんでした。")
+        port_name, target = self._resolve_single_port(vid, pid, serial, refresh)
 
         if read_bytes is not None and read_bytes <= 0:
             read_bytes = None
@@ -374,7 +522,7 @@ class UsbSnapshotService:
             "response_raw": response_bytes,
             "response_text": response_text,
             "encoding": encoding,
-            "device": target,
+            "device": target.as_dict(),
         }
 
     def get_com_port_for_device(
@@ -399,24 +547,89 @@ class UsbSnapshotService:
         """
         connections = self.find_device_connections(vid, pid, serial, refresh=refresh)
         for entry in connections:
-            com_port = entry.get("com_port")
+            com_port = entry.com_port
             if com_port:
                 return com_port
         return None
 
+    def _resolve_single_port(
+        self,
+        vid: str,
+        pid: str,
+        serial: Optional[str],
+        refresh: bool,
+    ) -> Tuple[str, DeviceConnection]:
+        """送信対象の単一デバイスを特定し、(COMポート名, 接続情報) を返す。
+
+        一致候補の接続情報を全件組み立てず、COMポートを持つ最初の候補だけを返す。
+        シリアル未指定で候補が2件以上見つかった時点で曖昧エラーとする。
+        """
+        snapshots = self.find_snapshots(vid, pid, serial, refresh=refresh)
+        if not snapshots:
+            raise RuntimeError("指定されたVID/PIDに一致するデバイスが見つかりません。")
+
+        port_index = self._get_port_index()
+        target: Optional[UsbDeviceSnapshot] = None
+        port_name: Optional[str] = None
+        for snapshot in snapshots:
+            com_port = self._match_com_port(snapshot, port_index)
+            if not com_port:
+                continue
+            if target is not None:
+                raise RuntimeError(
+                    "複数の一致するCOMポートが見つかりました。シリアル番号を指定して絞り込んでください。"
+                )
+            target, port_name = snapshot, com_port
+            if serial is not None:
+                break
+
+        if target is None or not port_name:
+            raise RuntimeError("一致するデバイスは見つかったものの、COMポートを検出できませんでした。")
+        return port_name, self._connection_entry(target, port_name)
+
     @staticmethod
-    def _match_com_port(snapshot: UsbDeviceSnapshot, ports: List[dict]) -> Optional[str]:
+    def _connection_entry(
+        snapshot: UsbDeviceSnapshot,
+        com_port: Optional[str],
+    ) -> DeviceConnection:
+        return DeviceConnection(
+            snapshot=snapshot,
+            identity=snapshot.identity(),
+            serial=snapshot.serial,
+            com_port=com_port,
+            # 不変・ハッシュ可能な記録にするためタプルで持つ（タプルならtuple()はコピーしない）
+            port_path=tuple(snapshot.port_path),
+            bus=snapshot.bus,
+            address=snapshot.address,
+        )
+
+    def _get_port_index(self) -> _PortIndex:
+        """キャッシュ中のCOMポート一覧から (VID, PID[, シリアル]) 索引を返す。"""
+        ports = self._get_com_ports_cached()
+        if self._port_index is None or self._port_index[0] is not ports:
+            self._port_index = (ports, self._build_port_index(ports))
+        return self._port_index[1]
+
+    @staticmethod
+    def _build_port_index(ports: List[Dict[str, Optional[str]]]) -> _PortIndex:
+        # 線形探索と同じく、同じキーでは一覧の先頭側のポートを優先する
+        by_vidpid: Dict[Tuple[str, str], Optional[str]] = {}
+        by_serial: Dict[Tuple[str, str, str], Optional[str]] = {}
         for port in ports:
-            if (
-                _normalize_hex(port.get("vid")) == _normalize_hex(snapshot.vid)
-                and _normalize_hex(port.get("pid")) == _normalize_hex(snapshot.pid)
-            ):
-                serial = _normalize_serial(snapshot.serial)
-                port_serial = _normalize_serial(port.get("serial_number"))
-                if serial and serial != port_serial:
-                    continue
-                return port.get("device")
-        return None
+            vid = _normalize_hex(port.get("vid"))
+            pid = _normalize_hex(port.get("pid"))
+            device = port.get("device")
+            by_vidpid.setdefault((vid, pid), device)
+            by_serial.setdefault((vid, pid, _normalize_serial(port.get("serial_number"))), device)
+        return by_vidpid, by_serial
+
+    @staticmethod
+    def _match_com_port(snapshot: UsbDeviceSnapshot, port_index: _PortIndex) -> Optional[str]:
+        by_vidpid, by_serial = port_index
+        serial = snapshot.serial_norm
+        if serial:
+            return by_serial.get((snapshot.vid_norm, snapshot.pid_norm, serial))
+        return by_vidpid.get((snapshot.vid_norm, snapshot.pid_norm))
 
 
 def _normalize_hex(value: Optional[object]) -> str:
@@ -0,0 +1,35 @@
+"""スナップショットJSONの高速エンコード/デコード補助。
+
+orjsonが導入されていればそれを使い、無ければ標準のjsonへフォールバックする。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+try:  # pragma: no cover - optional dependency
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
+
+def dumps_pretty(obj: Any) -> str:
+    """インデント2・非ASCIIそのままのJSON文字列を返す。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
+def dumps_pretty_bytes(obj: Any) -> bytes:
+    """dumps_pretty() と同じ内容をUTF-8バイト列で返す（orjsonではデコードを省く）。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """JSON文字列/バイト列をデコードする。失敗時は json.JSONDecodeError 互換の例外を送出する。"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -3,12 +3,16 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import importlib.util
+import operator
 import os
 import platform
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from ctypes.util import find_library
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from .device_models import UsbDeviceSnapshot
 
@@ -33,6 +37,69 @@ except Exception:  # pragma: no cover - optional dependency
     BleDevice = None  # type: ignore
 
 
+_DEVICE_ATTRS = (
+    "idVendor",
+    "idProduct",
+    "bcdDevice",
+    "bDeviceClass",
+    "bDeviceSubClass",
+    "bDeviceProtocol",
+    "bMaxPacketSize0",
+    "iManufacturer",
+    "iProduct",
+    "iSerialNumber",
+    "bNumConfigurations",
+)
+_CONFIG_ATTRS = (
+    "bConfigurationValue",
+    "bmAttributes",
+    "bMaxPower",
+    "iConfiguration",
+    "bNumInterfaces",
+)
+_INTERFACE_ATTRS = (
+    "bInterfaceNumber",
+    "bAlternateSetting",
+    "bNumEndpoints",
+    "bInterfaceClass",
+    "bInterfaceSubClass",
+    "bInterfaceProtocol",
+    "iInterface",
+)
+_ENDPOINT_ATTRS = (
+    "bEndpointAddress",
+    "bmAttributes",
+    "wMaxPacketSize",
+    "bInterval",
+)
+_DEVICE_GETTER = operator.attrgetter(*_DEVICE_ATTRS)
+_CONFIG_GETTER = operator.attrgetter(*_CONFIG_ATTRS)
+_INTERFACE_GETTER = operator.attrgetter(*_INTERFACE_ATTRS)
+_ENDPOINT_GETTER = operator.attrgetter(*_ENDPOINT_ATTRS)
+_LOCATION_ATTRS = ("bus", "address")
+_LOCATION_GETTER = operator.attrgetter(*_LOCATION_ATTRS)
+_STRING_INDEX_ATTRS = ("iManufacturer", "iProduct", "iSerialNumber")
+_STRING_INDEX_GETTER = operator.attrgetter(*_STRING_INDEX_ATTRS)
+
+# 見つかったlibusb1バックエンド（未発見の間はNoneのまま毎回探し直す）
+_LIBUSB_BACKEND: Any = None
+
+# PyUSBスキャンで文字列ディスクリプタを並行取得するスレッド数の上限
+_SNAPSHOT_WORKERS = 8
+
+_USB_CLASS_NAMES: Dict[int, str] = {
+    0x02: "CDC-ACM",
+    0x03: "HID",
+    0xFE: "USBTMC",
+    0xFF: "Vendor",
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _hex_class_code(cls_value: int) -> str:
+    return f"0x{cls_value:02X}"
+
+
 class UsbScanner:
     """プラットフォーム別のUSBスキャンを、フォールバック付きで提供する。"""
 
@@ -148,9 +215,23 @@ class UsbScanner:
         if devices_iter is None:
             return [], None
 
-        snapshots: List[UsbDeviceSnapshot] = []
-        for device in devices_iter:
-            snapshots.append(self._snapshot_device(device, usb.util))
+        devices = list(devices_iter)
+        if len(devices) <= 1:
+            return [self._snapshot_device(device, usb.util) for device in devices], None
+        # 文字列ディスクリプタ取得は1件ごとの制御転送でI/O待ちが支配的なので、get_string() だけを
+        # デバイス単位でスレッドに振り分ける（同一デバイスへの転送は1スレッドに留める）。
+        # 構成の走査や言語IDの取得はPyUSBのスレッド安全性が保証されないため逐次のまま行う
+        requests = [self._string_request(usb.util, device) for device in devices]
+        with ThreadPoolExecutor(max_workers=min(_SNAPSHOT_WORKERS, len(devices))) as executor:
+            strings = list(
+                executor.map(
+                    lambda item: self._read_strings(usb.util, item[0], *item[1]), zip(devices, requests)
+                )
+            )
+        snapshots = [
+            self._snapshot_device(device, usb.util, device_strings)
+            for device, device_strings in zip(devices, strings)
+        ]
         return snapshots, None
 
     @staticmethod
@@ -210,6 +291,17 @@ class UsbScanner:
 
     @staticmethod
     def _resolve_backend():
+        """libusb1バックエンドを探す。ライブラリ探索は重いので見つかった結果だけをプロセス内で使い回す。
+
+        見つからなかった場合は記憶せず、後からlibusbが導入されても次回のスキャンで拾えるようにする。
+        """
+        global _LIBUSB_BACKEND
+        if _LIBUSB_BACKEND is None:
+            _LIBUSB_BACKEND = UsbScanner._find_backend()
+        return _LIBUSB_BACKEND
+
+    @staticmethod
+    def _find_backend():
         try:
             from usb.backend import libusb1  # type: ignore
         except ImportError:
@@ -244,82 +336,107 @@ class UsbScanner:
             return "取得不可"
 
     @classmethod
-    def _safe_str(cls, usb_util: Any, obj: Any, idx: Any) -> str:
+    def _safe_get_many(
+        cls,
+        obj: Any,
+        attrs: Tuple[str, ...],
+        getter: Callable[[Any], Tuple[Any, ...]],
+    ) -> Dict[str, Any]:
+        """複数属性を attrgetter でまとめて取得し、欠損時のみ1属性ずつ取り直す。"""
         try:
-            return usb_util.get_string(obj, idx)
-        except Exception:
+            values = getter(obj)
+        except AttributeError:
+            return {attr: cls._safe_get(obj, attr) for attr in attrs}
+        return {attr: "取得不可" if value is None else value for attr, value in zip(attrs, values)}
+
+    @classmethod
+    def _safe_str(
+        cls,
+        usb_util: Any,
+        obj: Any,
+        idx: Any,
+        langid: Optional[int] = None,
+        cache: Optional[Dict[Any, Optional[str]]] = None,
+    ) -> Optional[str]:
+        # 制御転送を発行せずに、get_string() を呼んだ場合と同じ値を返す
+        # （インデックス0は文字列なし=None、インデックス自体が読めなければ"取得不可"）
+        if idx == 0:
+            return None
+        if idx is None or idx == "取得不可":
             return "取得不可"
+        if cache is not None and idx in cache:
+            return cache[idx]
+        try:
+            value = usb_util.get_string(obj, idx, langid)
+        except Exception:
+            value = "取得不可"
+        if cache is not None:
+            cache[idx] = value
+        return value
 
-    def _snapshot_device(self, device: Any, usb_util: Any) -> UsbDeviceSnapshot:
-        vid_val = self._safe_get(device, "idVendor")
-        pid_val = self._safe_get(device, "idProduct")
-        device_descriptor: Dict[str, Any] = {}
-        for attr in [
-            "idVendor",
-            "idProduct",
-            "bcdDevice",
-            "bDeviceClass",
-            "bDeviceSubClass",
-            "bDeviceProtocol",
-            "bMaxPacketSize0",
-            "iManufacturer",
-            "iProduct",
-            "iSerialNumber",
-            "bNumConfigurations",
-        ]:
-            device_descriptor[attr] = self._safe_get(device, attr)
+    @staticmethod
+    def _preferred_langid(usb_util: Any, device: Any) -> Optional[int]:
+        """get_string() 毎の言語ID問い合わせを避けるため、先頭の言語IDを1回だけ取得する。"""
+        try:
+            langids = usb_util.get_langids(device)
+        except Exception:
+            return None
+        return langids[0] if langids else None
+
+    @classmethod
+    def _string_request(cls, usb_util: Any, device: Any) -> Tuple[Tuple[Any, ...], Optional[int]]:
+        """文字列ディスクリプタの (インデックス, 言語ID) を返す。文字列が無ければ言語IDは問い合わせない。"""
+        indices = tuple(cls._safe_get_many(device, _STRING_INDEX_ATTRS, _STRING_INDEX_GETTER).values())
+        langid: Optional[int] = None
+        if any(idx not in (0, None, "取得不可") for idx in indices):
+            langid = cls._preferred_langid(usb_util, device)
+        return indices, langid
+
+    @classmethod
+    def _read_strings(
+        cls, usb_util: Any, device: Any, indices: Tuple[Any, ...], langid: Optional[int]
+    ) -> Tuple[Any, ...]:
+        """製造者/製品/シリアルの文字列ディスクリプタを読む（get_string() のみを発行する）。"""
+        string_cache: Dict[Any, Any] = {}
+        return tuple(cls._safe_str(usb_util, device, idx, langid, string_cache) for idx in indices)
+
+    def _snapshot_device(
+        self, device: Any, usb_util: Any, strings: Optional[Tuple[Any, ...]] = None
+    ) -> UsbDeviceSnapshot:
+        device_descriptor = self._safe_get_many(device, _DEVICE_ATTRS, _DEVICE_GETTER)
+        vid_val = device_descriptor["idVendor"]
+        pid_val = device_descriptor["idProduct"]
 
         configurations: List[Dict[str, Any]] = []
+        class_list: List[str] = []
         for cfg in device:
-            cfg_info: Dict[str, Any] = {"configuration_descriptor": {}, "interfaces": []}
-            for cfg_attr in [
-                "bConfigurationValue",
-                "bmAttributes",
-                "bMaxPower",
-                "iConfiguration",
-                "bNumInterfaces",
-            ]:
-                cfg_info["configuration_descriptor"][cfg_attr] = self._safe_get(cfg, cfg_attr)
+            cfg_info: Dict[str, Any] = {
+                "configuration_descriptor": self._safe_get_many(cfg, _CONFIG_ATTRS, _CONFIG_GETTER),
+                "interfaces": [],
+            }
             for intf in cfg:
-                intf_info: Dict[str, Any] = {"interface_descriptor": {}, "endpoints": []}
-                for intf_attr in [
-                    "bInterfaceNumber",
-                    "bAlternateSetting",
-                    "bNumEndpoints",
-                    "bInterfaceClass",
-                    "bInterfaceSubClass",
-                    "bInterfaceProtocol",
-                    "iInterface",
-                ]:
-                    intf_info["interface_descriptor"][intf_attr] = self._safe_get(intf, intf_attr)
+                intf_info: Dict[str, Any] = {
+                    "interface_descriptor": self._safe_get_many(intf, _INTERFACE_ATTRS, _INTERFACE_GETTER),
+                    "endpoints": [],
+                }
+                cls_value = intf_info["interface_descriptor"]["bInterfaceClass"]
+                if cls_value != "取得不可":
+                    class_list.append(self._class_name(cls_value))
                 endpoints = getattr(intf, "_endpoints", None)
                 if endpoints:
                     for ep in endpoints:
-                        endpoint_info: Dict[str, Any] = {}
-                        for ep_attr in [
-                            "bEndpointAddress",
-                            "bmAttributes",
-                            "wMaxPacketSize",
-                            "bInterval",
-                        ]:
-                            endpoint_info[ep_attr] = self._safe_get(ep, ep_attr)
-                        intf_info["endpoints"].append(endpoint_info)
+                        intf_info["endpoints"].append(
+                            self._safe_get_many(ep, _ENDPOINT_ATTRS, _ENDPOINT_GETTER)
+                        )
                 cfg_info["interfaces"].append(intf_info)
             configurations.append(cfg_info)
 
-        class_list: List[str] = []
-        for cfg in device:
-            for intf in cfg:
-                cls_value = self._safe_get(intf, "bInterfaceClass")
-                if cls_value == "取得不可":
-                    continue
-                class_list.append(self._class_name(cls_value))
-
-        manufacturer = self._safe_str(usb_util, device, self._safe_get(device, "iManufacturer"))
-        product = self._safe_str(usb_util, device, self._safe_get(device, "iProduct"))
-        serial = self._safe_str(usb_util, device, self._safe_get(device, "iSerialNumber"))
-        bus = self._safe_get(device, "bus")
-        address = self._safe_get(device, "address")
+        if strings is None:
+            strings = self._read_strings(usb_util, device, *self._string_request(usb_util, device))
+        manufacturer, product, serial = strings
+        location = self._safe_get_many(device, _LOCATION_ATTRS, _LOCATION_GETTER)
+        bus = location["bus"]
+        address = location["address"]
         port_numbers: List[int] = []
         try:
             port_numbers = list(device.port_numbers)
@@ -345,19 +462,14 @@ class UsbScanner:
 
     @staticmethod
     def _class_name(value: Any) -> str:
+        # PyUSBは整数を返すので、通常はint()変換を通さず表引きだけで済ませる
+        if type(value) is int:
+            return _USB_CLASS_NAMES.get(value) or _hex_class_code(value)
         try:
             cls_value = int(value)
         except (TypeError, ValueError):
             return str(value)
-        if cls_value == 0x02:
-            return "CDC-ACM"
-        if cls_value == 0x03:
-            return "HID"
-        if cls_value == 0xFE:
-            return "USBTMC"
-        if cls_value == 0xFF:
-            return "Vendor"
-        return f"0x{cls_value:02X}"
+        return _USB_CLASS_NAMES.get(cls_value) or _hex_class_code(cls_value)
 
     @staticmethod
     def _error_snapshot(message: str) -> UsbDeviceSnapshot:
@@ -399,7 +511,7 @@ class UsbScanner:
 
     @staticmethod
     def _parse_vid_pid(pnp_device_id: str) -> Tuple[str, str]:
-        match = re.search(r"VID_([0-9A-Fa-f]{4}).*PID_([0-9A-Fa-f]{4})", pnp_device_id or "")
+        match = _VID_PID_RE.search(pnp_device_id or "")
         if not match:
             return "", ""
         return match.group(1).upper(), match.group(2).upper()
@@ -408,10 +520,8 @@ class UsbScanner:
     def _parse_serial_from_pnpid(pnp_device_id: str) -> str:
         if not pnp_device_id:
             return ""
-        parts = re.split(r"[\\#]", pnp_device_id)
-        if not parts:
-            return ""
-        return parts[-1].upper()
+        tail = pnp_device_id.rpartition("\\")[2]
+        return tail.rpartition("#")[2].upper()
 
     @staticmethod
     def _safe_wmi_attr(obj: Any, attr: str) -> str:
@@ -485,21 +595,74 @@ class DeviceScanner:
 
 
 PORT_TOKEN_RE = re.compile(r"(Port_#\d+|Hub_#\d+)", re.IGNORECASE)
+_VID_PID_RE = re.compile(r"VID_([0-9A-Fa-f]{4}).*PID_([0-9A-Fa-f]{4})")
 
+# 全件列挙だと全プロパティがCOM越しに転送されるため、使う列とUSB配下の行だけを問い合わせる
+_WQL_USB_PNP_ENTITIES = (
+    "SELECT DeviceID, LocationInformation FROM Win32_PnPEntity WHERE DeviceID LIKE 'USB\\\\%'"
+)
+_WQL_USB_CONTROLLER_DEVICES = "SELECT Antecedent, Dependent FROM Win32_USBControllerDevice"
+_WQL_USB_CONTROLLERS = "SELECT DeviceID, Name FROM Win32_USBController"
 
-def annotate_windows_topology(snapshots: Iterable[UsbDeviceSnapshot]) -> None:
-    """WindowsでUSBトポロジー情報を付与する。"""
-    if not snapshots:
-        return
-    if platform.system().lower() != "windows":
-        return
+_IS_WINDOWS = platform.system().lower() == "windows"
+_WIN32COM_AVAILABLE: Optional[bool] = None
+
+
+def _win32com_available() -> bool:
+    """pywin32(win32com)の有無を初回のみ判定してキャッシュする。"""
+    global _WIN32COM_AVAILABLE
+    if _WIN32COM_AVAILABLE is None:
+        _WIN32COM_AVAILABLE = importlib.util.find_spec("win32com") is not None
+    return _WIN32COM_AVAILABLE
+
+
+def run_in_com_apartment(func: Callable[..., Any], *args: Any) -> Any:
+    """ワーカースレッドからWMI/win32comを使えるよう、COMを初期化して関数を実行する。"""
+    if not _IS_WINDOWS:
+        return func(*args)
     try:
-        import wmi  # type: ignore
+        import pythoncom  # type: ignore
     except ImportError:
-        return
+        return func(*args)
+    pythoncom.CoInitialize()
+    try:
+        return func(*args)
+    finally:
+        pythoncom.CoUninitialize()
 
-    resolver = _TopologyResolver(wmi.WMI())
-    mapping = resolver.build_mapping()
+
+def build_windows_topology_mapping() -> Dict[Tuple[str, str, str], Dict[str, List[str]]]:
+    """WindowsのUSBトポロジー対応表を構築する。Windows以外では空辞書を返す。"""
+    if not _IS_WINDOWS or not _win32com_available():
+        return {}
+    try:
+        import pywintypes  # type: ignore
+        import win32com.client  # type: ignore
+    except ImportError:
+        return {}
+
+    # wmiパッケージのラッパーは参照型プロパティ(Dependent等)を行ごとにGetObjectし直すため、
+    # SWbemServicesを直接使う。参照型の値はWMIパス文字列のまま返る
+    try:
+        services = win32com.client.Dispatch("WbemScripting.SWbemLocator").ConnectServer(".", "root\\cimv2")
+        return _TopologyResolver(services).build_mapping()
+    except pywintypes.com_error as exc:  # pragma: no cover - platform specific
+        print(f"USBトポロジー情報の取得に失敗しました: {exc}", file=sys.stderr)
+        return {}
+
+
+def annotate_windows_topology(
+    snapshots: Iterable[UsbDeviceSnapshot],
+    mapping: Optional[Dict[Tuple[str, str, str], Dict[str, List[str]]]] = None,
+) -> None:
+    """WindowsでUSBトポロジー情報を付与する。
+
+    ``mapping`` に事前構築済みの対応表を渡すと、WMIへの再問い合わせを省略する。
+    """
+    if not _IS_WINDOWS or not snapshots:
+        return
+    if mapping is None:
+        mapping = build_windows_topology_mapping()
     if not mapping:
         return
 
@@ -516,15 +679,14 @@ def annotate_windows_topology(snapshots: Iterable[UsbDeviceSnapshot]) -> None:
 
 
 class _TopologyResolver:
-    def __init__(self, wmi_client: "wmi.WMI") -> None:  # type: ignore
-        self._wmi = wmi_client
+    def __init__(self, services: Any) -> None:
+        self._services = services
 
     def build_mapping(self) -> Dict[Tuple[str, str, str], Dict[str, List[str]]]:
-        dep_to_ctrl = self._map_entity_to_controller()
-        ctrl_names = self._controller_names()
+        dep_to_ctrl_names = self._map_entity_to_controller_names()
         mapping: Dict[Tuple[str, str, str], Dict[str, List[str]]] = {}
 
-        for dev in self._wmi.Win32_PnPEntity():
+        for dev in self._services.ExecQuery(_WQL_USB_PNP_ENTITIES):
             device_id = _topology_norm(getattr(dev, "DeviceID", ""))
             if not device_id.startswith("USB\\"):
                 continue
@@ -534,17 +696,13 @@ class _TopologyResolver:
             serial = _topology_parse_serial_from_pnpid(device_id)
             location_info = _topology_norm(getattr(dev, "LocationInformation", ""))
             chain = _topology_parse_location_chain(location_info)
-            controllers = [
-                ctrl_names.get(ctrl_id, ctrl_id)
-                for ctrl_id in dep_to_ctrl.get(device_id, [])
-            ]
 
             entry = {
                 "pnp_device_id": device_id,
                 "location_information": location_info,
                 "location_fallback": "",
                 "port_hub_chain": chain,
-                "usb_controllers": controllers,
+                "usb_controllers": dep_to_ctrl_names.get(device_id, []),
             }
 
             key_with_serial = (vid, pid, serial)
@@ -554,34 +712,50 @@ class _TopologyResolver:
 
         return mapping
 
-    def _map_entity_to_controller(self) -> Dict[str, List[str]]:
-        dep_to_ctrl: Dict[str, List[str]] = {}
-
-        def extract_deviceid(relpath: Optional[str]) -> Optional[str]:
-            if not relpath:
-                return None
-            match = re.search(r'DeviceID="([^\"]+)"', relpath)
-            return match.group(1) if match else None
+    def _map_entity_to_controller_names(self) -> Dict[str, List[str]]:
+        """依存デバイスのDeviceIDから所属コントローラ名の一覧を1パスで引けるようにする。"""
+        ctrl_names = self._controller_names()
+        dep_to_ctrl_names: Dict[str, List[str]] = {}
 
-        for rel in self._wmi.Win32_USBControllerDevice():
-            dep_path = getattr(rel, "Dependent", None)
-            ant_path = getattr(rel, "Antecedent", None)
-            dep_id = extract_deviceid(dep_path)
-            ant_id = extract_deviceid(ant_path)
-            if dep_id and ant_id:
-                dep_to_ctrl.setdefault(dep_id, []).append(ant_id)
+        for rel in self._services.ExecQuery(_WQL_USB_CONTROLLER_DEVICES):
+            dep_id = _extract_wmi_device_id(getattr(rel, "Dependent", None))
+            # 対応表はUSB\配下のPnPエンティティからしか引かないので、HID\等の依存デバイスは捨てる
+            if not dep_id or not dep_id.startswith("USB\\"):
+                continue
+            ant_id = _extract_wmi_device_id(getattr(rel, "Antecedent", None))
+            if ant_id:
+                names = dep_to_ctrl_names.setdefault(dep_id, [])
+                name = ctrl_names.get(ant_id, ant_id)
+                # 同じコントローラとの関連が重複して返っても、名称は1回だけ並べる
+                if name not in names:
+                    names.append(name)
 
-        return dep_to_ctrl
+        return dep_to_ctrl_names
 
     def _controller_names(self) -> Dict[str, str]:
         names: Dict[str, str] = {}
-        for ctrl in self._wmi.Win32_USBController():
+        for ctrl in self._services.ExecQuery(_WQL_USB_CONTROLLERS):
             device_id = _topology_norm(getattr(ctrl, "DeviceID", ""))
             if device_id:
-                names[device_id] = _topology_norm(getattr(ctrl, "Name", "")) or device_id
+                names[device_id] = sys.intern(_topology_norm(getattr(ctrl, "Name", "")) or device_id)
         return names
 
 
+def _extract_wmi_device_id(relpath: Optional[str]) -> Optional[str]:
+    """WMIパス（…DeviceID="USB\\\\VID_…"）から DeviceID の値を取り出す。"""
+    if not relpath:
+        return None
+    # 関連クラスの行ごとに2回呼ばれるので、正規表現ではなく文字列分割で済ませる
+    _head, found, rest = relpath.partition('DeviceID="')
+    if not found:
+        return None
+    value, closed, _tail = rest.partition('"')
+    if not closed or not value:
+        return None
+    # WMIパス中の "\" は "\\" にエスケープされているので、DeviceIDの表記に戻す
+    return value.replace("\\\\", "\\")
+
+
 def _topology_snapshot_key(snapshot: UsbDeviceSnapshot, *, include_serial: bool) -> Tuple[str, str, str]:
     vid = _topology_normalize_vid_pid(snapshot.vid)
     pid = _topology_normalize_vid_pid(snapshot.pid)
@@ -596,7 +770,7 @@ def _topology_parse_location_chain(location_info: str) -> List[str]:
 
 
 def _topology_parse_vid_pid(pnp_device_id: str) -> Tuple[str, str]:
-    match = re.search(r"VID_([0-9A-Fa-f]{4}).*PID_([0-9A-Fa-f]{4})", pnp_device_id or "")
+    match = _VID_PID_RE.search(pnp_device_id or "")
     if match:
         return match.group(1).upper(), match.group(2).upper()
     return "", ""
@@ -605,8 +779,8 @@ def _topology_parse_vid_pid(pnp_device_id: str) -> Tuple[str, str]:
 def _topology_parse_serial_from_pnpid(pnp_device_id: str) -> str:
     if not pnp_device_id:
         return ""
-    parts = re.split(r"[\\#]", pnp_device_id)
-    return parts[-1].upper() if parts else ""
+    tail = pnp_device_id.rpartition("\\")[2]
+    return tail.rpartition("#")[2].upper()
 
 
 def _topology_normalize_vid_pid(value: Any) -> str:
@@ -1,13 +1,30 @@
 from __future__ import annotations
 
+import functools
+import mmap
 import os
+import re
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+import tempfile
+from array import array
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 # USB-util project root
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 索引サイドカーの形式が変わったら上げる
+_SIDECAR_VERSION = 7
+# サイドカー先頭の識別値（b"USBIDIDX"）。バイト順の異なるファイルもここで弾く
+_SIDECAR_MAGIC = 0x5553424944494458
+# ヘッダー: 識別値, 版, mtime_ns, サイズ, 件数。以降は (vid, オフセット, 長さ) の繰り返し
+_SIDECAR_HEADER = 5
 
+# ベンダー行: 行頭が4桁16進 + 区切り(空白/タブ)。`^`+MULTILINEより改行起点の方が速い
+_VENDOR_ID_RE = re.compile(rb"([0-9a-fA-F]{4})[ \t]")
+_VENDOR_LINE_RE = re.compile(rb"\n([0-9a-fA-F]{4})[ \t]")
 
+
+@functools.lru_cache(maxsize=None)
 def find_usb_ids_path() -> str:
     """Return the first existing usb.ids path across supported platforms."""
     candidates: List[Optional[str]] = []
@@ -16,115 +33,313 @@ def find_usb_ids_path() -> str:
         candidates.append(env_path)
     candidates.append(os.path.join(BASE_DIR, "usb.ids"))
     candidates.append(os.path.join(os.getcwd(), "usb.ids"))
-    candidates.extend(
-        [
-            "/usr/share/hwdata/usb.ids",
-            "/usr/share/misc/usb.ids",
-            "/var/lib/usbutils/usb.ids",
-            "/opt/homebrew/share/hwdata/usb.ids",
-            "/opt/local/share/hwdata/usb.ids",
-        ]
-    )
+    # 他OSのシステムパスは存在し得ないので、stat呼び出し自体を省く
     if sys.platform.startswith("win"):
         program_data = os.environ.get("ProgramData")
         if program_data:
             candidates.append(os.path.join(program_data, "usb.ids"))
+    else:
+        candidates.extend(
+            [
+                "/usr/share/hwdata/usb.ids",
+                "/usr/share/misc/usb.ids",
+                "/var/lib/usbutils/usb.ids",
+            ]
+        )
+        if sys.platform == "darwin":
+            candidates.extend(
+                [
+                    "/opt/homebrew/share/hwdata/usb.ids",
+                    "/opt/local/share/hwdata/usb.ids",
+                ]
+            )
     for path in candidates:
-        if path and os.path.exists(path):
-            return os.path.abspath(path)
+        if not path:
+            continue
+        try:
+            os.stat(path)
+        except OSError:
+            continue
+        return os.path.abspath(path)
     return os.path.join(BASE_DIR, "usb.ids")
 
 
-def _normalize_usb_id(value: Any) -> Optional[str]:
-    """値をUSB ID表記(4桁の16進文字列)に正規化する。"""
+def _usb_id_value(value: Any) -> Optional[int]:
+    """USB ID表記(int / "0x1234" / "1234" など)を整数値に変換する。解釈できなければNone。"""
     if value is None:
         return None
     if isinstance(value, int):
-        return format(value, "04x")
-    text = str(value).strip().lower()
-    if text.startswith("0x"):
-        text = text[2:]
-    return text.zfill(4)
+        return value
+    return _parse_usb_id_text(value if isinstance(value, str) else str(value))
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_usb_id_text(text: str) -> Optional[int]:
+    # 実際に現れるID表記は少数なので結果を使い回す。int()が"0x"接頭辞・空白・大小文字を吸収する
+    try:
+        return int(text, 16)
+    except ValueError:
+        return None
+
+
+def _split_id_line(line: bytes) -> Tuple[bytes, str]:
+    """`{id}  {name}` 形式の行を (idのバイト列, 名称) に分ける。デコードは名称部分のみ。"""
+    parts = line.split(None, 1)
+    if not parts:
+        return b"", ""
+    name = parts[1].strip().decode("utf-8", "replace") if len(parts) > 1 else ""
+    return parts[0], name
+
+
+def _block_end(mm: mmap.mmap, offset: int) -> int:
+    """offsetの行より後で最初に現れるトップレベル行（タブ/コメント/空行以外）の位置を返す。"""
+    pos = mm.find(b"\n", offset)
+    size = len(mm)
+    while 0 <= pos < size - 1:
+        if mm[pos + 1 : pos + 2] not in (b"\t", b"#", b"\r", b"\n"):
+            return pos + 1
+        pos = mm.find(b"\n", pos + 1)
+    return -1
 
 
 class UsbIdsDatabase:
-    """usb.idsファイルをパースし、ベンダーID・プロダクトIDから名称を解決する。"""
+    """usb.idsファイルをパースし、ベンダーID・プロダクトIDから名称を解決する。
+
+    起動時はベンダーブロックのバイト範囲だけを索引化し、製品情報は
+    `lookup()` で必要になったベンダーのブロックのみを読み込む。
+    """
 
     def __init__(self, ids_path: Optional[str] = None) -> None:
         self.ids_path = ids_path or find_usb_ids_path()
-        self._cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._cache: Optional[Mapping[int, Tuple[int, int]]] = None
+        # 読み込み済みベンダーの名称と、(vid << 16) | pid をキーにした製品名
+        self._vendor_names: Dict[int, str] = {}
+        self._products: Dict[int, str] = {}
+        self._lookup_cache: Dict[Tuple[Any, Any], Tuple[Optional[str], Optional[str]]] = {}
 
     def reload(self) -> None:
         self._cache = None
+        self._vendor_names = {}
+        self._products = {}
+        self._lookup_cache = {}
 
     def lookup(self, vid: Any, pid: Any) -> Tuple[Optional[str], Optional[str]]:
-        vendors = self._ensure_cache()
-        norm_vid = _normalize_usb_id(vid)
-        norm_pid = _normalize_usb_id(pid)
-        if norm_vid is None or norm_pid is None:
-            return None, None
-        vendor_entry = vendors.get(norm_vid)
-        if not vendor_entry:
-            return None, None
-        vendor_name = vendor_entry.get("name")
-        product_entry = vendor_entry["products"].get(norm_pid)
-        product_name = product_entry.get("name") if product_entry else None
-        return vendor_name, product_name
-
-    def _ensure_cache(self) -> Dict[str, Dict[str, Any]]:
+        # 同じ表記での再問い合わせは変換せずにハッシュ1回で返す
+        raw_key = (vid, pid)
+        cached = self._lookup_cache.get(raw_key)
+        if cached is not None:
+            return cached
+        vid_value = _usb_id_value(vid)
+        if vid_value is None or pid is None:
+            result: Tuple[Optional[str], Optional[str]] = (None, None)
+        else:
+            # PIDが解釈できなくてもベンダー名は返す
+            result = self._lookup_values(vid_value, _usb_id_value(pid))
+        self._lookup_cache[raw_key] = result
+        return result
+
+    def _lookup_values(
+        self, vid_value: int, pid_value: Optional[int]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """整数化済みIDで名称を解決する（結果は整数キーでも記憶する）。"""
+        value_key = (vid_value, pid_value)
+        cached = self._lookup_cache.get(value_key)
+        if cached is not None:
+            return cached
+        vendor_name = self._vendor_name(vid_value)
+        if vendor_name is None:
+            result: Tuple[Optional[str], Optional[str]] = (None, None)
+        else:
+            product_name: Optional[str] = None
+            if pid_value is not None and 0 <= pid_value <= 0xFFFF:
+                product_name = self._products.get((vid_value << 16) | pid_value)
+            result = (vendor_name, product_name)
+        self._lookup_cache[value_key] = result
+        return result
+
+    def _vendor_name(self, vid_value: int) -> Optional[str]:
+        """ベンダー名を返す。未読み込みならそのブロックを解析して製品名も登録する。"""
+        name = self._vendor_names.get(vid_value)
+        if name is not None:
+            return name
+        span = self._ensure_cache().get(vid_value)
+        if span is None:
+            return None
+        parsed = self._parse_vendor_block(self.ids_path, *span)
+        if parsed is None or parsed[0] != vid_value:
+            # 起動後にusb.idsが更新されオフセットがずれた。読み込み済みの名称も含めて作り直す
+            self.reload()
+            span = self._ensure_cache().get(vid_value)
+            if span is None:
+                return None
+            parsed = self._parse_vendor_block(self.ids_path, *span)
+        if parsed is None or parsed[0] != vid_value:
+            return None
+        _vendor_id, name, products = parsed
+        base = vid_value << 16
+        self._products.update((base | pid_value, product) for pid_value, product in products.items())
+        self._vendor_names[vid_value] = name
+        return name
+
+    def _ensure_cache(self) -> Mapping[int, Tuple[int, int]]:
         if self._cache is None:
-            self._cache = self._parse_usb_ids(self.ids_path)
+            # 索引は読み取り専用。共有インスタンス越しの誤更新を防ぐため読み取りビューで持つ
+            self._cache = MappingProxyType(self._load_or_parse(self.ids_path))
         return self._cache
 
+    @classmethod
+    def _load_or_parse(cls, ids_path: str) -> Dict[int, Tuple[int, int]]:
+        """索引サイドカーが最新ならそれを読み、無ければテキストを索引化して書き出す。"""
+        try:
+            stat = os.stat(ids_path)
+        except OSError:
+            return {}
+        cache_path = ids_path + ".idx"
+        index = cls._read_sidecar(cache_path, stat.st_mtime_ns, stat.st_size)
+        if index is not None:
+            return index
+        index = cls._parse_usb_ids(ids_path)
+        if index:
+            cls._write_sidecar(cache_path, stat.st_mtime_ns, stat.st_size, index)
+        return index
+
     @staticmethod
-    def _parse_usb_ids(ids_path: str) -> Dict[str, Dict[str, Any]]:
-        vendors: Dict[str, Dict[str, Any]] = {}
-        current_vendor: Optional[str] = None
-        current_product: Optional[str] = None
+    def _read_sidecar(cache_path: str, mtime_ns: int, size: int) -> Optional[Dict[int, Tuple[int, int]]]:
+        """サイドカーを整数配列として読み、形式と値域を検証する。不一致ならNone。
+
+        サイドカーはusb.idsと同じ（他ユーザーも書ける可能性のある）場所に置かれるため、
+        コード実行を伴い得るpickleは使わず、数値以外を含み得ない形式に限定する。
+        """
+        values = array("q")
         try:
-            with open(ids_path, "r", encoding="utf-8") as infile:
-                for raw_line in infile:
-                    line = raw_line.rstrip("\n")
-                    if not line or line.startswith("#"):
-                        continue
-                    if line.startswith("\t\t"):
-                        if current_vendor is None or current_product is None:
-                            continue
-                        parts = line.strip().split(None, 1)
-                        if not parts:
-                            continue
-                        interface_code = parts[0].lower()
-                        interface_name = parts[1].strip() if len(parts) > 1 else ""
-                        product_entry = vendors[current_vendor]["products"].setdefault(
-                            current_product, {"name": "", "interfaces": []}
-                        )
-                        product_entry["interfaces"].append(
-                            {"code": interface_code, "name": interface_name}
-                        )
-                        continue
-                    if line.startswith("\t"):
-                        if current_vendor is None:
-                            continue
-                        parts = line.strip().split(None, 1)
-                        if not parts:
-                            continue
-                        product_id = _normalize_usb_id(parts[0])
-                        product_name = parts[1].strip() if len(parts) > 1 else ""
-                        vendors[current_vendor]["products"][product_id] = {
-                            "name": product_name,
-                            "interfaces": [],
-                        }
-                        current_product = product_id
-                        continue
-                    parts = line.split(None, 1)
-                    if not parts:
-                        continue
-                    vendor_id = _normalize_usb_id(parts[0])
-                    vendor_name = parts[1].strip() if len(parts) > 1 else ""
-                    vendors.setdefault(vendor_id, {"name": vendor_name, "products": {}})
-                    vendors[vendor_id]["name"] = vendor_name
-                    current_vendor = vendor_id
-                    current_product = None
+            with open(cache_path, "rb") as infile:
+                values.frombytes(infile.read())
+        except (OSError, ValueError):
+            # サイドカーが無い/長さが8の倍数でない場合はテキストパースへフォールバック
+            return None
+        if len(values) < _SIDECAR_HEADER:
+            return None
+        magic, version, cached_mtime, cached_size, count = values[:_SIDECAR_HEADER]
+        if (magic, version, cached_mtime, cached_size) != (_SIDECAR_MAGIC, _SIDECAR_VERSION, mtime_ns, size):
+            return None
+        if count < 0 or len(values) != _SIDECAR_HEADER + 3 * count:
+            return None
+        index: Dict[int, Tuple[int, int]] = {}
+        for pos in range(_SIDECAR_HEADER, len(values), 3):
+            vid, offset, length = values[pos : pos + 3]
+            if not (0 <= vid <= 0xFFFF and 0 <= offset < size and -1 <= length <= size):
+                return None
+            index[vid] = (offset, length)
+        return index
+
+    @staticmethod
+    def _write_sidecar(cache_path: str, mtime_ns: int, size: int, index: Dict[int, Tuple[int, int]]) -> None:
+        values = array("q", (_SIDECAR_MAGIC, _SIDECAR_VERSION, mtime_ns, size, len(index)))
+        for vid, (offset, length) in index.items():
+            values.extend((vid, offset, length))
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                "wb", dir=os.path.dirname(cache_path) or None, suffix=".tmp", delete=False
+            ) as outfile:
+                tmp_path = outfile.name
+                values.tofile(outfile)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # 書き込み不可な配置(/usr/share等)ではキャッシュせずに続行する
+            if tmp_path is None:
+                return
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _parse_usb_ids(ids_path: str) -> Dict[int, Tuple[int, int]]:
+        """ベンダーID -> (ベンダー行のバイトオフセット, ブロック長) の索引を作る。
+
+        ブロック長は次のベンダー行までのバイト数。末尾のベンダーは後続のクラス定義などの
+        トップレベル行の手前まで（見つからなければ-1=EOFまで）。
+
+        ファイルをmmapし、コンパイル済み正規表現で一括走査する。
+        """
+        starts: List[Tuple[int, int]] = []
+        try:
+            with open(ids_path, "rb") as infile:
+                try:
+                    mm = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # 空ファイルはmmapできない
+                    return {}
+                with mm:
+                    first = _VENDOR_ID_RE.match(mm)
+                    if first:
+                        starts.append((int(first.group(1), 16), 0))
+                    for match in _VENDOR_LINE_RE.finditer(mm):
+                        starts.append((int(match.group(1), 16), match.start(1)))
+                    tail_end = _block_end(mm, starts[-1][1]) if starts else -1
         except OSError:
             return {}
-        return vendors
+        index: Dict[int, Tuple[int, int]] = {}
+        ends = [offset for _vid, offset in starts[1:]] + [tail_end]
+        for (vid, offset), end in zip(starts, ends):
+            if vid not in index:
+                index[vid] = (offset, end - offset if end >= 0 else -1)
+        return index
+
+    @staticmethod
+    def _parse_vendor_block(
+        ids_path: str, offset: int, length: int = -1
+    ) -> Optional[Tuple[int, str, Dict[int, str]]]:
+        """オフセット位置のベンダーブロックを一度に読み込み、(ベンダーID, ベンダー名, {pid: 製品名}) を返す。
+
+        呼び出し側が索引とファイル内容の食い違いを検出できるよう、実際に読んだベンダーIDも返す。
+
+        名称解決に不要なインターフェース行（タブ2つ）は読み飛ばす。
+        """
+        intern = sys.intern
+        try:
+            # 範囲が分かっているので1回のread()で足りる。バッファ経由のコピーを省くため非バッファで開く
+            with open(ids_path, "rb", buffering=0) as infile:
+                infile.seek(offset)
+                block = infile.read(length)
+        except OSError:
+            return None
+        lines = block.split(b"\n")
+        vendor_id, vendor_name = _split_id_line(lines[0])
+        try:
+            vendor_value = int(vendor_id, 16)
+        except ValueError:
+            # 空行や行の途中を指している（索引が古い）
+            return None
+        products: Dict[int, str] = {}
+        for raw_line in lines[1:]:
+            if raw_line.startswith(b"\t\t"):
+                continue
+            if raw_line[:1] != b"\t":
+                # 空行・コメントは読み飛ばし、それ以外のトップレベル行でブロック終了
+                if raw_line[:1] in (b"#", b"\r", b""):
+                    continue
+                break
+            # 製品行は1件ずつ関数を経由せず、その場でID/名称に分ける
+            parts = raw_line.split(None, 1)
+            if not parts:
+                continue
+            try:
+                product_id = int(parts[0], 16)
+            except ValueError:
+                continue
+            if product_id <= 0xFFFF:
+                products[product_id] = intern(
+                    parts[1].strip().decode("utf-8", "replace") if len(parts) > 1 else ""
+                )
+        return vendor_value, intern(vendor_name), products
+
+
+def get_ids_database(ids_path: Optional[str] = None) -> UsbIdsDatabase:
+    """プロセス内で共有する UsbIdsDatabase を返す（同じパスなら同一インスタンス）。"""
+    return _ids_database_for(os.path.abspath(ids_path or find_usb_ids_path()))
+
+
+@functools.lru_cache(maxsize=None)
+def _ids_database_for(ids_path: str) -> UsbIdsDatabase:
+    return UsbIdsDatabase(ids_path)
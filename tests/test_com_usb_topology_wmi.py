@@ -0,0 +1,41 @@
+"""tools/diagnostics/com_usb_topology_wmi.py の WMI パス解析のテスト。"""
+
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("serial")
+
+_SCRIPT = Path(__file__).resolve().parents[1] / "tools" / "diagnostics" / "com_usb_topology_wmi.py"
+_spec = importlib.util.spec_from_file_location("com_usb_topology_wmi", _SCRIPT)
+topology = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(topology)
+
+PNP_ID = r"USB\VID_0403&PID_6001\A50285BI"
+CONTROLLER_ID = r"PCI\VEN_8086&DEV_A36D&SUBSYS_86941043&REV_10\3&11583659&0&A0"
+DEPENDENT_RELPATH = r'\\DESKTOP-1\root\cimv2:Win32_PnPEntity.DeviceID="USB\\VID_0403&PID_6001\\A50285BI"'
+ANTECEDENT_RELPATH = (
+    r'\\DESKTOP-1\root\cimv2:Win32_USBController.DeviceID="PCI\\VEN_8086&DEV_A36D&SUBSYS_86941043&REV_10\\3&11583659&0&A0"'
+)
+HID_RELPATH = r'\\DESKTOP-1\root\cimv2:Win32_PnPEntity.DeviceID="HID\\VID_046D&PID_C52B&MI_00\\7&1A2B3C4D&0&0000"'
+
+
+def test_extract_deviceid_unescapes_backslashes():
+    assert topology.extract_deviceid(DEPENDENT_RELPATH) == PNP_ID
+    assert topology.extract_deviceid(ANTECEDENT_RELPATH) == CONTROLLER_ID
+    assert topology.extract_deviceid(None) is None
+
+
+def test_map_entity_to_controller_keeps_com_port_dependents():
+    relations = [
+        SimpleNamespace(Antecedent=ANTECEDENT_RELPATH, Dependent=DEPENDENT_RELPATH),
+        SimpleNamespace(Antecedent=ANTECEDENT_RELPATH, Dependent=DEPENDENT_RELPATH),
+        SimpleNamespace(Antecedent=ANTECEDENT_RELPATH, Dependent=HID_RELPATH),
+    ]
+    services = SimpleNamespace(ExecQuery=lambda wql: relations)
+
+    assert topology.map_entity_to_controller(services, [PNP_ID, ""]) == {PNP_ID: [CONTROLLER_ID]}
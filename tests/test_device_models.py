@@ -0,0 +1,217 @@
+"""core.device_models の保存/読込とCOMポート照合のテスト。"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from types import ModuleType
+
+import pytest
+
+from core import json_codec
+from core.com_ports import ComPortManager
+from core.device_models import UsbDeviceSnapshot, UsbSnapshotRepository, UsbSnapshotService
+
+
+def _snapshots():
+    return [
+        UsbDeviceSnapshot(
+            vid="0x0403",
+            pid="0x6001",
+            manufacturer="FTDI",
+            product="FT232R USB UART",
+            serial="A50285BI",
+            bus=1,
+            address=7,
+            port_path=[1, 4, 2],
+            device_descriptor={"idVendor": 1027, "bcdUSB": 512, "iSerialNumber": 3},
+            configurations=[{"configuration_descriptor": {"bNumInterfaces": 1}, "interfaces": []}],
+            class_guess="Vendor",
+            topology_chain=["ルートハブ", "Port_#0004.Hub_#0002"],
+            location_information="Port_#0004.Hub_#0002",
+        ),
+        UsbDeviceSnapshot(vid="0x2341", pid="0x0043", manufacturer=None, product="", serial=None),
+        UsbDeviceSnapshot(
+            vid="-",
+            pid="-",
+            device_type="ble",
+            ble_address="AA:BB:CC:DD:EE:FF",
+            ble_name="センサー",
+            ble_rssi=-61,
+            ble_uuids=["180f"],
+        ),
+    ]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def codec(request, monkeypatch):
+    if request.param == "orjson":
+        if json_codec.orjson is None:
+            pytest.skip("orjson is not installed")
+    else:
+        monkeypatch.setattr(json_codec, "orjson", None)
+    return request.param
+
+
+def test_save_matches_json_dumps_indent2(tmp_path, codec):
+    path = tmp_path / "usb_devices.json"
+    snapshots = _snapshots()
+    UsbSnapshotRepository(str(path)).save(snapshots)
+
+    expected = json.dumps([snap.to_dict() for snap in snapshots], ensure_ascii=False, indent=2)
+    assert path.read_bytes() == expected.encode("utf-8")
+
+
+def test_save_empty_list_matches_json_dumps(tmp_path, codec):
+    path = tmp_path / "usb_devices.json"
+    UsbSnapshotRepository(str(path)).save([])
+    assert path.read_bytes() == json.dumps([], indent=2).encode("utf-8")
+
+
+
+def test_save_load_round_trip(tmp_path, codec):
+    path = str(tmp_path / "usb_devices.json")
+    snapshots = _snapshots()
+    UsbSnapshotRepository(path).save(snapshots)
+
+    assert UsbSnapshotRepository(path).load() == snapshots
+
+
+PORTS = [
+    {"device": "/dev/ttyUSB0", "vid": "0x403", "pid": "0x6001", "serial_number": "OTHER"},
+    {"device": "/dev/ttyUSB1", "vid": "0x403", "pid": "0x6001", "serial_number": "a50285bi"},
+    {"device": "/dev/ttyACM0", "vid": "0x2341", "pid": "0x43", "serial_number": None},
+]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(ComPortManager, "get_com_ports", staticmethod(lambda ttl=0.0: list(PORTS)))
+    repository = UsbSnapshotRepository(str(tmp_path / "usb_devices.json"))
+    repository.save(_snapshots())
+    return UsbSnapshotService(scanner=None, repository=repository)
+
+
+def test_find_device_connections_matches_by_serial(service):
+    results = service.find_device_connections("0403", "6001", "A50285BI")
+    assert [entry.com_port for entry in results] == ["/dev/ttyUSB1"]
+    entry = results[0]
+    assert entry.serial == "A50285BI"
+    assert entry.port_path == (1, 4, 2)
+
+
+def test_device_connection_keeps_dict_access(service):
+    entry = service.find_device_connections("0403", "6001", "A50285BI")[0]
+    assert entry["com_port"] == "/dev/ttyUSB1"
+    assert entry.get("serial") == "A50285BI"
+    assert entry.get("missing", "default") == "default"
+    assert "bus" in entry and "missing" not in entry
+    with pytest.raises(KeyError):
+        entry["missing"]
+    assert dict(entry)["address"] == 7
+    assert entry.as_dict()["port_path"] == [1, 4, 2]
+
+
+def test_find_device_connections_serial_mismatch(service):
+    assert service.find_device_connections("0403", "6001", "NOPE") == []
+
+
+def test_find_device_connections_matches_by_vid_pid(service):
+    # シリアルの無いデバイスは (VID, PID) の先頭ポートに対応付ける
+    results = service.find_device_connections("0x2341", "0x0043")
+    assert [entry.com_port for entry in results] == ["/dev/ttyACM0"]
+    assert service.get_com_port_for_device("2341", "43") == "/dev/ttyACM0"
+
+
+def test_find_device_connections_skips_ble_and_unknown(service):
+    assert service.find_device_connections("-", "-") == []
+    assert service.find_device_connections("ffff", "ffff") == []
+    assert service.get_com_port_for_device("ffff", "ffff") is None
+
+
+class _FakeScanner:
+    def __init__(self, snapshots, error=None):
+        self.result = (snapshots, error)
+
+    def scan(self):
+        return self.result
+
+
+@pytest.fixture
+def scan_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(ComPortManager, "get_com_ports", staticmethod(lambda ttl=0.0: []))
+    scanner = _FakeScanner(_snapshots())
+    repository = UsbSnapshotRepository(str(tmp_path / "usb_devices.json"))
+    return UsbSnapshotService(scanner, repository), scanner, repository
+
+
+def test_refresh_saves_successful_scan_including_empty_result(scan_service):
+    service, scanner, repository = scan_service
+    service.refresh()
+    assert repository.load() == _snapshots()
+
+    # 全デバイスを外した後の正常なスキャンは、古い一覧を残さずに保存する
+    scanner.result = ([], None)
+    service.refresh()
+    saved = repository.load()
+    assert len(saved) == 1 and saved[0].error == "USB/BTデバイスが見つかりません"
+
+
+def test_refresh_keeps_saved_result_when_scan_fails(scan_service):
+    service, scanner, repository = scan_service
+    service.refresh()
+
+    scanner.result = ([], "libusbが見つかりません")
+    snapshots, error = service.refresh()
+    assert error == "libusbが見つかりません"
+    assert snapshots[0].error == "libusbが見つかりません"
+    assert repository.load() == _snapshots()
+
+
+def test_refresh_scans_inside_a_com_apartment(scan_service, monkeypatch):
+    from core import scanners
+
+    initialized = set()
+    pythoncom = ModuleType("pythoncom")
+    pythoncom.CoInitialize = lambda: initialized.add(threading.get_ident())
+    pythoncom.CoUninitialize = lambda: initialized.discard(threading.get_ident())
+    monkeypatch.setitem(sys.modules, "pythoncom", pythoncom)
+    monkeypatch.setattr(scanners, "_IS_WINDOWS", True)
+    monkeypatch.setattr(scanners, "_WIN32COM_AVAILABLE", False)
+
+    service, scanner, _repository = scan_service
+    scanned_in_apartment = []
+
+    def scan():
+        # Windowsのスキャナは wmi.WMI() を呼ぶので、COM初期化済みのスレッドで動く必要がある
+        scanned_in_apartment.append(threading.get_ident() in initialized)
+        return _snapshots(), None
+
+    scanner.scan = scan
+    worker = threading.Thread(target=service.refresh)
+    worker.start()
+    worker.join()
+
+    assert scanned_in_apartment == [True]
+    assert not initialized
+
+
+def test_unchanged_save_skips_write_but_external_edit_is_rewritten(tmp_path):
+    path = tmp_path / "usb_devices.json"
+    repository = UsbSnapshotRepository(str(path))
+    repository.save(_snapshots())
+    first_stat = path.stat()
+
+    repository.save(_snapshots())
+    assert path.stat().st_mtime_ns == first_stat.st_mtime_ns
+
+    path.write_text("[]", encoding="utf-8")
+    repository.save(_snapshots())
+    assert UsbSnapshotRepository(str(path)).load() == _snapshots()
+
+
+def test_load_missing_file_returns_placeholder(tmp_path):
+    snapshots = UsbSnapshotRepository(str(tmp_path / "missing.json")).load()
+    assert len(snapshots) == 1
+    assert snapshots[0].error
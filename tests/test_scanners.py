@@ -0,0 +1,128 @@
+"""core.scanners のWindowsトポロジー解析（WMI非依存部分）のテスト。"""
+
+from __future__ import annotations
+
+import sys
+from types import ModuleType, SimpleNamespace
+
+from core import scanners
+from core.scanners import (
+    _WQL_USB_CONTROLLER_DEVICES,
+    _WQL_USB_CONTROLLERS,
+    _WQL_USB_PNP_ENTITIES,
+    _TopologyResolver,
+    _extract_wmi_device_id,
+)
+
+# Win32_USBControllerDevice の参照型プロパティが返す実際のWMIパス（"\" は "\\" にエスケープされる）
+DEPENDENT_RELPATH = r'\\DESKTOP-1\root\cimv2:Win32_PnPEntity.DeviceID="USB\\VID_0403&PID_6001\\A50285BI"'
+HID_RELPATH = r'\\DESKTOP-1\root\cimv2:Win32_PnPEntity.DeviceID="HID\\VID_046D&PID_C52B&MI_00\\7&1A2B3C4D&0&0000"'
+CONTROLLER_ID = r"PCI\VEN_8086&DEV_A36D&SUBSYS_86941043&REV_10\3&11583659&0&A0"
+ANTECEDENT_RELPATH = (
+    r'\\DESKTOP-1\root\cimv2:Win32_USBController.DeviceID="PCI\\VEN_8086&DEV_A36D&SUBSYS_86941043&REV_10\\3&11583659&0&A0"'
+)
+
+
+def test_extract_wmi_device_id_unescapes_backslashes():
+    assert _extract_wmi_device_id(DEPENDENT_RELPATH) == r"USB\VID_0403&PID_6001\A50285BI"
+    assert _extract_wmi_device_id(ANTECEDENT_RELPATH) == CONTROLLER_ID
+
+
+def test_extract_wmi_device_id_rejects_malformed_paths():
+    assert _extract_wmi_device_id(None) is None
+    assert _extract_wmi_device_id("") is None
+    assert _extract_wmi_device_id(r"\\DESKTOP-1\root\cimv2:Win32_PnPEntity") is None
+    assert _extract_wmi_device_id('Win32_PnPEntity.DeviceID="USB') is None
+    assert _extract_wmi_device_id('Win32_PnPEntity.DeviceID=""') is None
+
+
+class _FakeServices:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def ExecQuery(self, wql):
+        return self._rows[wql]
+
+
+def _topology_services(relations):
+    return _FakeServices(
+        {
+            _WQL_USB_CONTROLLERS: [
+                SimpleNamespace(DeviceID=CONTROLLER_ID, Name="Intel(R) USB 3.1 eXtensible Host Controller"),
+            ],
+            _WQL_USB_CONTROLLER_DEVICES: [
+                SimpleNamespace(Antecedent=antecedent, Dependent=dependent) for antecedent, dependent in relations
+            ],
+            _WQL_USB_PNP_ENTITIES: [
+                SimpleNamespace(
+                    DeviceID=r"USB\VID_0403&PID_6001\A50285BI",
+                    LocationInformation="Port_#0004.Hub_#0002",
+                ),
+            ],
+        }
+    )
+
+
+def test_topology_resolver_maps_controllers_by_unescaped_device_id():
+    resolver = _TopologyResolver(_topology_services([(ANTECEDENT_RELPATH, DEPENDENT_RELPATH)]))
+    assert resolver._map_entity_to_controller_names() == {
+        r"USB\VID_0403&PID_6001\A50285BI": ["Intel(R) USB 3.1 eXtensible Host Controller"],
+    }
+
+    mapping = resolver.build_mapping()
+    entry = mapping[("0403", "6001", "A50285BI")]
+    assert entry["usb_controllers"] == ["Intel(R) USB 3.1 eXtensible Host Controller"]
+    assert entry["port_hub_chain"] == ["Port_#0004", "Hub_#0002"]
+    assert mapping[("0403", "6001", "")] is entry
+
+
+def test_topology_resolver_skips_duplicates_and_non_usb_dependents():
+    resolver = _TopologyResolver(
+        _topology_services(
+            [
+                (ANTECEDENT_RELPATH, DEPENDENT_RELPATH),
+                # 同じ関連が重複して返っても名称は1回だけ
+                (ANTECEDENT_RELPATH, DEPENDENT_RELPATH),
+                # USB\配下以外の依存デバイスは対応表に載せない
+                (ANTECEDENT_RELPATH, HID_RELPATH),
+            ]
+        )
+    )
+    assert resolver._map_entity_to_controller_names() == {
+        r"USB\VID_0403&PID_6001\A50285BI": ["Intel(R) USB 3.1 eXtensible Host Controller"],
+    }
+
+
+def _install_fake_win32com(monkeypatch, connect_server):
+    pywintypes = ModuleType("pywintypes")
+    pywintypes.com_error = type("com_error", (Exception,), {})
+    locator = SimpleNamespace(ConnectServer=lambda host, namespace: connect_server(pywintypes))
+    client = ModuleType("win32com.client")
+    client.Dispatch = lambda prog_id: locator if prog_id == "WbemScripting.SWbemLocator" else None
+    win32com = ModuleType("win32com")
+    win32com.client = client
+    monkeypatch.setitem(sys.modules, "pywintypes", pywintypes)
+    monkeypatch.setitem(sys.modules, "win32com", win32com)
+    monkeypatch.setitem(sys.modules, "win32com.client", client)
+    monkeypatch.setattr(scanners, "_IS_WINDOWS", True)
+    monkeypatch.setattr(scanners, "_WIN32COM_AVAILABLE", True)
+
+
+def test_build_windows_topology_mapping_uses_swbem_services(monkeypatch):
+    services = _topology_services([(ANTECEDENT_RELPATH, DEPENDENT_RELPATH), (ANTECEDENT_RELPATH, HID_RELPATH)])
+    _install_fake_win32com(monkeypatch, lambda _pywintypes: services)
+
+    mapping = scanners.build_windows_topology_mapping()
+    assert mapping[("0403", "6001", "A50285BI")]["usb_controllers"] == [
+        "Intel(R) USB 3.1 eXtensible Host Controller"
+    ]
+
+
+def test_build_windows_topology_mapping_returns_empty_on_com_error(monkeypatch, capsys):
+    def fail(pywintypes):
+        raise pywintypes.com_error("RPC server unavailable")
+
+    _install_fake_win32com(monkeypatch, fail)
+
+    assert scanners.build_windows_topology_mapping() == {}
+    assert "RPC server unavailable" in capsys.readouterr().err
@@ -0,0 +1,95 @@
+"""core.usb_ids の名称解決と索引サイドカーのテスト。"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from core.usb_ids import UsbIdsDatabase
+
+USB_IDS_TEXT = """\
+# 先頭のコメント行
+#
+0001  Alpha Corp
+\t0001  Alpha One
+\t0002  Alpha Two
+\t\t00  Interface line (skipped)
+0a12  Beta Ltd
+\t1234  Beta Dongle
+
+# 末尾ベンダーの後ろのトップレベル行で索引が終わること
+fffe  Omega
+\tabcd  Omega Device
+C 00  (Defined at Interface level)
+\t01  Audio
+"""
+
+
+@pytest.fixture
+def ids_path(tmp_path):
+    path = tmp_path / "usb.ids"
+    path.write_text(USB_IDS_TEXT, encoding="utf-8")
+    return str(path)
+
+
+def _forbid_text_parse(monkeypatch):
+    def fail(_ids_path):
+        raise AssertionError("サイドカーがあるのにテキストを再索引した")
+
+    monkeypatch.setattr(UsbIdsDatabase, "_parse_usb_ids", staticmethod(fail))
+
+
+def test_lookup_resolves_vendor_and_product(ids_path):
+    db = UsbIdsDatabase(ids_path)
+    assert db.lookup("0001", "0002") == ("Alpha Corp", "Alpha Two")
+    assert db.lookup("0x0A12", "0x1234") == ("Beta Ltd", "Beta Dongle")
+    assert db.lookup(0xFFFE, 0xABCD) == ("Omega", "Omega Device")
+
+
+def test_sidecar_round_trip(ids_path, monkeypatch):
+    expected = UsbIdsDatabase(ids_path).lookup("0a12", "1234")
+    assert os.path.exists(ids_path + ".idx")
+
+    _forbid_text_parse(monkeypatch)
+    assert UsbIdsDatabase(ids_path).lookup("0a12", "1234") == expected
+
+
+def test_stale_sidecar_is_reindexed(ids_path):
+    assert UsbIdsDatabase(ids_path).lookup("0a12", "1234") == ("Beta Ltd", "Beta Dongle")
+
+    with open(ids_path, "w", encoding="utf-8") as outfile:
+        outfile.write("0000  Zero Inc\n" + USB_IDS_TEXT.replace("Beta Dongle", "Beta Dongle v2"))
+
+    assert UsbIdsDatabase(ids_path).lookup("0a12", "1234") == ("Beta Ltd", "Beta Dongle v2")
+
+
+def test_corrupt_sidecar_falls_back_to_text(ids_path):
+    UsbIdsDatabase(ids_path).lookup("0001", "0001")
+    with open(ids_path + ".idx", "ab") as outfile:
+        outfile.write(b"garbage")
+
+    assert UsbIdsDatabase(ids_path).lookup("0001", "0001") == ("Alpha Corp", "Alpha One")
+
+
+def test_lookup_unknown_ids(ids_path):
+    db = UsbIdsDatabase(ids_path)
+    # PIDが無くてもベンダー名は返す
+    assert db.lookup("0001", "9999") == ("Alpha Corp", None)
+    assert db.lookup("0001", "zzzz") == ("Alpha Corp", None)
+    assert db.lookup("1111", "0001") == (None, None)
+    assert db.lookup(None, "0001") == (None, None)
+    # 末尾ベンダーのブロックはクラス定義行の手前で終わる
+    assert db.lookup("fffe", "0001") == ("Omega", None)
+
+
+def test_file_updated_after_indexing_is_detected(ids_path):
+    db = UsbIdsDatabase(ids_path)
+    assert db.lookup("0001", "0001") == ("Alpha Corp", "Alpha One")
+
+    # 同じインスタンスのまま先頭に行が増え、索引済みのオフセットがずれる
+    with open(ids_path, "w", encoding="utf-8") as outfile:
+        outfile.write("0000  Zero Inc\n\t0000  Zero Device\n" + USB_IDS_TEXT)
+
+    assert db.lookup("0a12", "1234") == ("Beta Ltd", "Beta Dongle")
+    assert db.lookup("0000", "0000") == ("Zero Inc", "Zero Device")
@@ -0,0 +1,42 @@
+"""usb_util_gui.get_com_port_for_device のフォールバック再スキャン抑止のテスト。"""
+
+from __future__ import annotations
+
+import pytest
+
+import usb_util_gui
+
+
+class _MissingDeviceService:
+    def __init__(self):
+        self.refresh_count = 0
+
+    def get_com_port_for_device(self, vid, pid, serial=None, *, refresh=False):
+        return None
+
+    def refresh(self):
+        self.refresh_count += 1
+        return [], None
+
+
+@pytest.fixture
+def service(monkeypatch):
+    fake = _MissingDeviceService()
+    monkeypatch.setattr(usb_util_gui, "_SERVICE_SINGLETON", fake)
+    monkeypatch.setattr(usb_util_gui, "_NEG_CACHE", {})
+    monkeypatch.setattr(usb_util_gui, "_LAST_REFRESH", 0.0)
+    return fake
+
+
+def test_negative_cache_matches_equivalent_id_spellings(service):
+    assert usb_util_gui.get_com_port_for_device("0x0403", "0x6001", "a50285bi") is None
+    assert usb_util_gui.get_com_port_for_device("0403", "6001", "A50285BI") is None
+    assert usb_util_gui.get_com_port_for_device("0x403", "0X6001", "A50285BI") is None
+    assert service.refresh_count == 1
+    assert list(usb_util_gui._NEG_CACHE) == [("0403", "6001", "A50285BI")]
+
+
+def test_negative_cache_keeps_different_devices_apart(service):
+    usb_util_gui.get_com_port_for_device("0403", "6001")
+    usb_util_gui.get_com_port_for_device("0403", "6015")
+    assert service.refresh_count == 2
@@ -7,11 +7,29 @@ PowerShell 不使用。WMI + pyserial だけで
   (4) Port_#xxxx.Hub_#yyyy 連鎖の可視化（ハブ階層の番号列）
 を行い、「どのハブの何番ポートか」をできるだけ具体的に出力する。
 
-依存: pip install pyserial wmi
+依存: pip install pyserial pywin32
 実行 (Windowsのみ): python tools/diagnostics/com_usb_topology_wmi.py
 """
 
+import json
+import platform
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
+from serial.tools import list_ports
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pythoncom
+    import win32com.client
+except ImportError:
+    pythoncom = win32com = None
 
 # ---- utils ------------------------------------------------------------------
 
@@ -19,6 +37,11 @@ def norm(s): return (s or "").strip()
 def upper(s): return norm(s).upper()
 
 PORT_TOKEN_RE = re.compile(r"(Port_#\d+|Hub_#\d+)", re.IGNORECASE)
+VID_PID_RE = re.compile(r'VID_([0-9A-Fa-f]{4}).*PID_([0-9A-Fa-f]{4})')
+PNPID_SPLIT_RE = re.compile(r'[\\#]')
+USB_HWID_RE = re.compile(r'(USB\\VID_[0-9A-Fa-f]{4}&PID_[0-9A-Fa-f]{4}\\[^ ]+)')
+# WQL文の長さ上限に掛からないよう、DeviceID の OR 条件は1回の問い合わせにこの件数まで
+LOCATION_QUERY_CHUNK = 50
 
 def parse_location_chain(location_info: str):
     """
@@ -32,7 +55,7 @@ def parse_location_chain(location_info: str):
     return PORT_TOKEN_RE.findall(location_info)
 
 def parse_vid_pid(pnp_device_id: str):
-    m = re.search(r'VID_([0-9A-Fa-f]{4}).*PID_([0-9A-Fa-f]{4})', pnp_device_id or "")
+    m = VID_PID_RE.search(pnp_device_id or "")
     if m:
         return m.group(1).upper(), m.group(2).upper()
     return None, None
@@ -40,11 +63,24 @@ def parse_vid_pid(pnp_device_id: str):
 def parse_serial_from_pnpid(pnp_device_id: str):
     if not pnp_device_id:
         return ""
-    parts = re.split(r'[\\#]', pnp_device_id)
+    parts = PNPID_SPLIT_RE.split(pnp_device_id)
     return parts[-1] if parts else ""
 
 # ---- inventory via WMI ------------------------------------------------------
 
+def connect_wmi():
+    # wmiパッケージのラッパーは属性参照ごとのディスパッチに加え、参照型(Dependent等)を
+    # 行ごとにGetObjectし直すので、SWbemServicesを直接使う。参照型はWMIパス文字列のまま返る
+    return win32com.client.Dispatch("WbemScripting.SWbemLocator").ConnectServer(".", "root\\cimv2")
+
+def run_wmi(func, *args):
+    """ワーカースレッドでCOMを初期化し、スレッド専用の接続で func(w, *args) を実行する。"""
+    pythoncom.CoInitialize()
+    try:
+        return func(connect_wmi(), *args)
+    finally:
+        pythoncom.CoUninitialize()
+
 def list_com_ports_pyserial():
     rows = []
     for p in list_ports.comports():
@@ -61,49 +97,61 @@ def list_com_ports_pyserial():
         })
     return rows
 
-def build_pnp_index(w):
+def wql_quote(value):
+    """WQL文字列リテラル用に \\ と ' をエスケープする。"""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def build_location_index(w, device_ids):
     """
-    Win32_PnPEntity を索引化。
+    Win32_PnPEntity の LocationInformation を索引化。
     - key: DeviceID（=PNPDeviceID）
-    - value: dict(name, manufacturer, class_guid, pnp_class, location_info, status)
+    - value: LocationInformation（下流で使うのはこの列だけなので、行ごとの辞書は作らない）
+    全件列挙は全PnPデバイスをCOM越しに転送して重いので、COMポートのDeviceIDと使う列だけを問い合わせる。
     """
     idx = {}
-    for dev in w.Win32_PnPEntity():
-        did = norm(dev.DeviceID)
-        if not did:
-            continue
-        idx[did] = {
-            "device_id": did,
-            "name": norm(dev.Name),
-            "manufacturer": norm(dev.Manufacturer),
-            "class_guid": norm(dev.ClassGuid),
-            "pnp_class": norm(dev.PNPClass),
-            "location_info": norm(dev.LocationInformation),
-            "status": norm(dev.Status),
-        }
+    device_ids = sorted({did for did in device_ids if did})
+    if not device_ids:
+        return idx
+    # WQLには IN 句が無いので OR で並べる。件数が多いと文が長くなりすぎるので分割して問い合わせる
+    for start in range(0, len(device_ids), LOCATION_QUERY_CHUNK):
+        chunk = device_ids[start:start + LOCATION_QUERY_CHUNK]
+        where = " OR ".join(f"DeviceID = {wql_quote(did)}" for did in chunk)
+        for dev in w.ExecQuery(f"SELECT DeviceID, LocationInformation FROM Win32_PnPEntity WHERE {where}"):
+            did = norm(dev.DeviceID)
+            if did:
+                idx[did] = norm(dev.LocationInformation)
     return idx
 
-def map_entity_to_controller(w):
+def extract_deviceid(relpath):
+    # 参照先オブジェクトは "__RELPATH" に WMI パスが入る。そこから DeviceID を抜く。
+    # 例: Win32_PnPEntity.DeviceID="USB\\VID_0403&PID_6001\\A50285BI"
+    # パス中の \ は \\ にエスケープされているので、PnPEntity の DeviceID と同じ表記に戻す
+    _, found, rest = (relpath or "").partition('DeviceID="')
+    if not found:
+        return None
+    value, closed, _ = rest.partition('"')
+    return value.replace("\\\\", "\\") if closed and value else None
+
+def map_entity_to_controller(w, device_ids):
     """
     Win32_USBControllerDevice は
       Antecedent: Win32_USBController
       Dependent : Win32_PnPEntity  (USB配下デバイス)
     の関連。Dependent(=PnP) → Antecedent(=Controller) を逆引きテーブル化。
+    引くのはCOMポートのDeviceIDだけなので、それ以外の依存デバイスは保持しない。
     """
+    wanted = {did for did in device_ids if did}
     dep_to_ctrl = defaultdict(list)
-    # 参照先オブジェクトは "__RELPATH" に WMI パスが入る。そこから DeviceID を抜く。
-    def extract_deviceid(relpath):
-        # 例: Win32_PnPEntity.DeviceID="USB\\VID_0403&PID_6001\\A50285BI"
-        m = re.search(r'DeviceID="([^"]+)"', relpath or "")
-        return m.group(1) if m else None
-
-    for rel in w.Win32_USBControllerDevice():
+    for rel in w.ExecQuery("SELECT Antecedent, Dependent FROM Win32_USBControllerDevice"):
         dep_path = getattr(rel, "Dependent", None)
         ant_path = getattr(rel, "Antecedent", None)
         dep_id = extract_deviceid(dep_path)
+        if dep_id not in wanted:
+            continue
         ant_id = extract_deviceid(ant_path)
-        if dep_id and ant_id:
-            dep_to_ctrl[dep_id].append(ant_id)
+        # 同じ組の関連が複数行返ることがあるので、順序を保ったまま重複を除く
+        if ant_id and ant_id not in dep_to_ctrl[dep_id]:
+            dep_to_ctrl[dep_id].append(sys.intern(ant_id))
     return dep_to_ctrl
 
 def build_controller_names(w):
@@ -112,42 +160,54 @@ def build_controller_names(w):
     例: "PCI\\VEN_8086&DEV_A12F&CC_0C03" => "Intel(R) USB 3.0 eXtensible Host Controller ..."
     """
     names = {}
-    for c in w.Win32_USBController():
+    for c in w.ExecQuery("SELECT DeviceID, Name FROM Win32_USBController"):
         did = norm(c.DeviceID)
         if did:
-            names[did] = norm(c.Name)
+            # 同じコントローラ名が多数のポートに並ぶので、文字列は1つに寄せる
+            names[did] = sys.intern(norm(c.Name))
     return names
 
+def dumps_json_bytes(obj):
+    """インデント2・非ASCIIそのままのJSONをUTF-8バイト列で返す（orjsonがあればそれを使う）。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
 # ---- correlate & report -----------------------------------------------------
 
+def com_pnpid(c):
+    # COM側 PNPDeviceID は pyserial.hwid に含まれることが多い
+    pnpid = c.get("hwid", "")
+    # hwidが "USB\\VID_xxxx&PID_yyyy\\SER" 形式ならそれを优先キーに
+    # 正規表現は "USB\\VID_" を含む場合しか一致しないので、先に部分文字列で絞る
+    if not pnpid.startswith("USB") and "USB\\VID_" in pnpid:
+        # hwid例: "USB VID:PID=0403:6001 SER=A50285BI LOCATION=1-3"
+        # このケースは "USB\\VID_XXXX&PID_YYYY\\SER" を探す
+        m = USB_HWID_RE.search(pnpid)
+        if m:
+            pnpid = m.group(1)
+    return pnpid
+
 def correlate_with_topology():
     if platform.system().lower() != "windows":
         print("Windows専用（WMI使用）。このスクリプトはWindows環境でのみ実行してください。")
         sys.exit(1)
 
-    if wmi is None:
-        print("Windows専用の wmi ライブラリが見つかりません。`pip install wmi` を実行してください。")
+    if win32com is None:
+        print("Windows専用の pywin32 (win32com) が見つかりません。`pip install pywin32` を実行してください。")
         sys.exit(1)
 
-    w = wmi.WMI()
-
     coms = list_com_ports_pyserial()
-    pnp_index = build_pnp_index(w)
-    dep_to_ctrl = map_entity_to_controller(w)
-    ctrl_names = build_controller_names(w)
+    pnpids = [com_pnpid(c) for c in coms]
+    # 3つのWMI問い合わせは互いに独立なので並行に投げる（COMプロキシはスレッド間で共有しない）
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        f_loc = ex.submit(run_wmi, build_location_index, pnpids)
+        f_dep = ex.submit(run_wmi, map_entity_to_controller, pnpids)
+        f_ctrl = ex.submit(run_wmi, build_controller_names)
+        loc_index, dep_to_ctrl, ctrl_names = f_loc.result(), f_dep.result(), f_ctrl.result()
 
     results = []
-    for c in coms:
-        # COM側 PNPDeviceID は pyserial.hwid に含まれることが多い
-        pnpid = c.get("hwid", "")
-        # hwidが "USB\\VID_xxxx&PID_yyyy\\SER" 形式ならそれを优先キーに
-        if not pnpid.startswith("USB") and "USB" in pnpid:
-            # hwid例: "USB VID:PID=0403:6001 SER=A50285BI LOCATION=1-3"
-            # このケースは "USB\\VID_XXXX&PID_YYYY\\SER" を探す
-            m = re.search(r'(USB\\VID_[0-9A-Fa-f]{4}&PID_[0-9A-Fa-f]{4}\\[^ ]+)', pnpid)
-            if m:
-                pnpid = m.group(1)
-
+    for c, pnpid in zip(coms, pnpids):
         vid_hex, pid_hex = c["vid_hex"], c["pid_hex"]
         if (not vid_hex or not pid_hex) and pnpid.startswith("USB\\VID_"):
             v2, p2 = parse_vid_pid(pnpid)
@@ -157,9 +217,7 @@ def correlate_with_topology():
         serial_guess = c.get("serial") or parse_serial_from_pnpid(pnpid)
 
         # PnP情報から LocationInformation を拾う
-        loc_info = ""
-        if pnpid in pnp_index:
-            loc_info = pnp_index[pnpid]["location_info"]
+        loc_info = loc_index.get(pnpid, "")
         # それが無ければ pyserial.location を使う（"1-4.3" 等）
         loc_fallback = c.get("location")
 
@@ -182,28 +240,29 @@ def correlate_with_topology():
             "usb_controllers": controllers,    # ["Intel(R) USB 3.2 ...", ...]
         })
 
-    # 表示
-    print("=== COM ↔ USB トポロジ（ハブ番号/ポート番号 & コントローラ名）===\n")
+    # 表示（1行ずつprintせず、まとめて1回で書き出す）
+    out = ["=== COM ↔ USB トポロジ（ハブ番号/ポート番号 & コントローラ名）===\n\n"]
     for r in results:
-        print(f"{r['com']}  {r['description']}")
-        print(f"  VID:PID={r['vid_hex']}:{r['pid_hex']}  Serial={r['serial']}")
-        print(f"  PNPDeviceID: {r['pnp_device_id']}")
+        out.append(f"{r['com']}  {r['description']}\n")
+        out.append(f"  VID:PID={r['vid_hex']}:{r['pid_hex']}  Serial={r['serial']}\n")
+        out.append(f"  PNPDeviceID: {r['pnp_device_id']}\n")
         if r["port_hub_chain"]:
-            print(f"  Chain: {' -> '.join(r['port_hub_chain'])}")
+            out.append(f"  Chain: {' -> '.join(r['port_hub_chain'])}\n")
         else:
-            print("  Chain: (LocationInformation なし / 解析不可)")
+            out.append("  Chain: (LocationInformation なし / 解析不可)\n")
         if r["location_fallback"]:
-            print(f"  Location(fallback): {r['location_fallback']}  (例: ルート=1, 下位=4.3)")
+            out.append(f"  Location(fallback): {r['location_fallback']}  (例: ルート=1, 下位=4.3)\n")
         if r["usb_controllers"]:
             for i, name in enumerate(r["usb_controllers"], 1):
-                print(f"  HostController[{i}]: {name}")
+                out.append(f"  HostController[{i}]: {name}\n")
         else:
-            print("  HostController: (未特定)")
-        print("")
+            out.append("  HostController: (未特定)\n")
+        out.append("\n")
+    sys.stdout.write("".join(out))
 
-    # JSON保存
-    with open("com_usb_topology_wmi.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    # JSON保存（json.dump は断片ごとに write するので、バイト列にしてから1回で書く）
+    with open("com_usb_topology_wmi.json", "wb") as f:
+        f.write(dumps_json_bytes(results))
     print("JSONを書き出しました: com_usb_topology_wmi.json")
 
 if __name__ == "__main__":
@@ -0,0 +1,218 @@
+"""表示範囲の行だけを描画する仮想化デバイス一覧ウィジェット。"""
+
+from __future__ import annotations
+
+import math
+import sys
+import tkinter as tk
+from typing import Any, Callable, List, Optional, Tuple
+
+import customtkinter as ctk
+
+
+class _Row:
+    """再利用される1行分のウィジェット。"""
+
+    def __init__(self, frame: ctk.CTkFrame, label: ctk.CTkLabel, window_id: int) -> None:
+        self.frame = frame
+        self.label = label
+        self.window_id = window_id
+        self.index = -1
+        self.text = ""
+        self.dimmed = False
+
+
+class VirtualDeviceList:
+    """固定高さの行をプールし、スクロール位置に合わせて内容を差し替える一覧。
+
+    デバイス数に関係なく、生成するウィジェットは可視行数+α に抑える。
+    """
+
+    def __init__(
+        self,
+        parent: Any,
+        *,
+        on_click: Callable[[int], None],
+        fg_color: Any = ("gray12", "gray18"),
+        width: int = 260,
+        item_padx: int = 6,
+        item_pady: int = 4,
+        label_padx: int = 8,
+        label_pady: int = 6,
+    ) -> None:
+        self._on_click = on_click
+        self._item_padx = item_padx
+        self._item_pady = item_pady
+        self._label_padx = label_padx
+        self._label_pady = label_pady
+
+        self.frame = ctk.CTkFrame(parent, fg_color=fg_color)
+        self._fg_color = fg_color
+        # 素のtk.Canvasはライト/ダーク切り替えに追従しないので、AppearanceModeTrackerの
+        # 公開API(add/remove/get_mode; customtkinter 6.0.0で確認)で背景色を差し替える
+        self._canvas = tk.Canvas(
+            self.frame,
+            width=width,
+            highlightthickness=0,
+            bd=0,
+            bg=self._mode_color(fg_color, ctk.AppearanceModeTracker.get_mode() == 1),
+        )
+        ctk.AppearanceModeTracker.add(self._on_appearance_mode, self._canvas)
+        self._canvas.bind("<Destroy>", self._on_canvas_destroy, add="+")
+        self._scrollbar = ctk.CTkScrollbar(self.frame, command=self._canvas.yview)
+        self._canvas.configure(yscrollcommand=self._on_canvas_scrolled)
+        self._scrollbar.pack(side="right", fill="y")
+        self._canvas.pack(side="left", fill="both", expand=True)
+
+        self._entries: List[Tuple[str, bool]] = []
+        self._rows: List[_Row] = []
+        self._row_height = 1
+        self._max_lines = 1
+        # CTkFont.metrics() は倍率適用前の値を返す
+        self._line_height = ctk.CTkFont().metrics("linespace")
+        self._message_label: Optional[ctk.CTkLabel] = None
+        # 行ラベルのフォントとpack余白はScalingTrackerで拡大されるが、キャンバス上の座標は
+        # 素のピクセルなので、行の高さと余白にも同じ倍率を掛ける
+        ctk.ScalingTracker.add_widget(self._on_scaling, self._canvas)
+        self._scaling = ctk.ScalingTracker.get_widget_scaling(self._canvas)
+
+        self._canvas.bind("<Configure>", self._on_canvas_configure)
+        self._bind_wheel(self._canvas)
+
+    # ----- public API ----------------------------------------------------
+    def pack(self, **kwargs: Any) -> None:
+        self.frame.pack(**kwargs)
+
+    def set_items(self, entries: List[Tuple[str, bool]]) -> None:
+        """表示内容を差し替える。行ウィジェットは再利用する。"""
+        self.hide_message()
+        self._entries = entries
+        self._max_lines = max((text.count("\n") + 1 for text, _ in entries), default=1)
+        self._layout()
+
+    def show_message(self, text: str, **label_kwargs: Any) -> ctk.CTkLabel:
+        """一覧を隠してメッセージを表示する（スキャン中表示など）。"""
+        self._entries = []
+        self._canvas.configure(scrollregion=(0, 0, 0, 0))
+        self._redraw()
+        if self._message_label is None:
+            self._message_label = ctk.CTkLabel(self.frame, text=text, **label_kwargs)
+        else:
+            self._message_label.configure(text=text, **label_kwargs)
+        self._message_label.place(relx=0.5, y=30, anchor="n")
+        return self._message_label
+
+    def hide_message(self) -> None:
+        if self._message_label is not None:
+            self._message_label.place_forget()
+
+    # ----- appearance ----------------------------------------------------
+    @staticmethod
+    def _mode_color(color: Any, dark: bool) -> str:
+        """(ライト, ダーク) の組ならモードに合う方を、単色ならそのまま返す。"""
+        if isinstance(color, (tuple, list)):
+            return color[1] if dark else color[0]
+        return color
+
+    def _on_appearance_mode(self, mode_string: str) -> None:
+        self._canvas.configure(bg=self._mode_color(self._fg_color, mode_string.lower() == "dark"))
+
+    def _on_scaling(self, widget_scaling: float, _window_scaling: float) -> None:
+        self._scaling = widget_scaling
+        self._on_canvas_configure()
+        self._layout()
+
+    def _on_canvas_destroy(self, event: Any) -> None:
+        if event.widget is self._canvas:
+            ctk.AppearanceModeTracker.remove(self._on_appearance_mode)
+            ctk.ScalingTracker.remove_widget(self._on_scaling, self._canvas)
+
+    def _scaled(self, value: float) -> int:
+        return round(value * self._scaling)
+
+    # ----- virtualization ------------------------------------------------
+    def _layout(self) -> None:
+        """行の高さ（表示倍率込み）とスクロール範囲を計算し直して再描画する。"""
+        self._row_height = max(
+            1,
+            self._scaled(
+                self._max_lines * self._line_height + 2 * self._label_pady + 2 * self._item_pady + 4
+            ),
+        )
+        self._canvas.configure(
+            scrollregion=(0, 0, 0, len(self._entries) * self._row_height),
+            yscrollincrement=max(1, self._row_height // 4),
+        )
+        self._redraw()
+
+    def _on_canvas_scrolled(self, first: str, last: str) -> None:
+        self._scrollbar.set(first, last)
+        self._redraw()
+
+    def _on_canvas_configure(self, _event: Any = None) -> None:
+        width = max(1, self._canvas.winfo_width() - 2 * self._scaled(self._item_padx))
+        for row in self._rows:
+            self._canvas.itemconfigure(row.window_id, width=width)
+        self._redraw()
+
+    def _ensure_pool(self, count: int) -> None:
+        width = max(1, self._canvas.winfo_width() - 2 * self._scaled(self._item_padx))
+        while len(self._rows) < count:
+            frame = ctk.CTkFrame(self._canvas, corner_radius=8)
+            label = ctk.CTkLabel(frame, text="", justify="left", anchor="w")
+            label.pack(fill="x", padx=self._label_padx, pady=self._label_pady)
+            window_id = self._canvas.create_window(
+                self._scaled(self._item_padx), 0, window=frame, anchor="nw", width=width, state="hidden"
+            )
+            row = _Row(frame, label, window_id)
+            for widget in (frame, label):
+                widget.bind("<Button-1>", lambda _event, r=row: self._row_clicked(r))
+                self._bind_wheel(widget)
+            self._rows.append(row)
+
+    def _redraw(self) -> None:
+        row_height = self._row_height
+        visible = math.ceil(max(1, self._canvas.winfo_height()) / row_height) + 1
+        self._ensure_pool(min(visible, len(self._entries)))
+        first = max(0, int(self._canvas.canvasy(0) // row_height))
+        item_padx = self._scaled(self._item_padx)
+        item_pady = self._scaled(self._item_pady)
+        frame_height = max(1, row_height - 2 * item_pady)
+        for offset, row in enumerate(self._rows):
+            index = first + offset
+            if index >= len(self._entries):
+                row.index = -1
+                self._canvas.itemconfigure(row.window_id, state="hidden")
+                continue
+            text, dimmed = self._entries[index]
+            if row.text != text or row.dimmed != dimmed:
+                row.label.configure(
+                    text=text,
+                    text_color=("#1f3c66", "#0f2845") if dimmed else ("black", "black"),
+                )
+                row.frame.configure(
+                    fg_color=("#9fd3ff", "#75b5f2") if dimmed else ("#50a7ff", "#2b82d9"),
+                )
+                row.text, row.dimmed = text, dimmed
+            row.index = index
+            self._canvas.coords(row.window_id, item_padx, index * row_height + item_pady)
+            self._canvas.itemconfigure(row.window_id, height=frame_height, state="normal")
+
+    def _row_clicked(self, row: _Row) -> None:
+        if row.index >= 0:
+            self._on_click(row.index)
+
+    # ----- mouse wheel ---------------------------------------------------
+    def _bind_wheel(self, widget: Any) -> None:
+        if sys.platform.startswith("linux"):
+            widget.bind("<Button-4>", lambda _event: self._canvas.yview_scroll(-1, "units"))
+            widget.bind("<Button-5>", lambda _event: self._canvas.yview_scroll(1, "units"))
+        else:
+            widget.bind("<MouseWheel>", self._on_mouse_wheel)
+
+    def _on_mouse_wheel(self, event: Any) -> None:
+        if sys.platform == "darwin":
+            step = -event.delta
+        else:
+            step = -int(event.delta / 120)
+        self._canvas.yview_scroll(step, "units")
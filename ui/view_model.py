@@ -2,21 +2,69 @@
 
 from __future__ import annotations
 
-import json
+import functools
 import sys
-from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from typing import Any, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
 
+from core import json_codec
 from core.com_ports import ComPortManager
 from core.device_models import UsbDeviceSnapshot, UsbSnapshotService
 
 
 if TYPE_CHECKING:  # pragma: no cover - 循環参照回避の型ヒントのみ
-    from usb_util_gui import UsbIdsDatabase  # type: ignore
+    from core.usb_ids import UsbIdsDatabase
+
+
+# GUI更新時のCOMポート列挙はこの秒数以内の結果を使い回す
+_COM_PORTS_TTL = 5.0
+
+# 詳細欄の項目（表示順）。値が無い項目は "―" のまま表示する
+_INFO_TEMPLATE: Dict[str, str] = dict.fromkeys(
+    (
+        "VID",
+        "usb.ids Vendor",
+        "PID",
+        "usb.ids Product",
+        "Manufacturer",
+        "Product",
+        "Serial",
+        "Identity",
+        "Bus",
+        "Address",
+        "Port Path",
+        "Class Guess",
+        "COMポート",
+        "接続経路",
+        "LocationInformation",
+        "BLE Address",
+        "BLE Name",
+        "BLE RSSI",
+        "BLE UUIDs",
+    ),
+    "―",
+)
 
 
 class UsbDevicesViewModel:
     """USBスナップショットとGUIをつなぐ状態管理。"""
 
+    # 属性は更新のたびに差し替えるだけなので、インスタンス辞書を持たせない
+    __slots__ = (
+        "_service",
+        "_ids_db",
+        "snapshots",
+        "com_ports",
+        "selected_index",
+        "_last_error",
+        "_enriched",
+        "_com_index",
+        "_com_by_vidpid",
+        "_com_devices",
+        "_key_index",
+        "_options",
+        "_list_entries_cache",
+    )
+
     def __init__(self, snapshot_service: UsbSnapshotService, ids_db: "UsbIdsDatabase") -> None:
         self._service = snapshot_service
         self._ids_db = ids_db
@@ -24,30 +72,104 @@ class UsbDevicesViewModel:
         self.com_ports: List[Dict[str, Optional[str]]] = []
         self.selected_index: int = 0
         self._last_error: Optional[str] = None
+        self._enriched: List[Dict[str, Any]] = []
+        self._com_index: Dict[Tuple[Any, Any, Any], Optional[str]] = {}
+        self._com_by_vidpid: Dict[Tuple[Any, Any], Optional[str]] = {}
+        self._com_devices: Set[Optional[str]] = set()
+        self._key_index: Dict[str, int] = {}
+        self._options: List[str] = []
+        # 接続確認はOSのデバイス列挙を伴うので、同じ更新サイクル内では結果を使い回す
+        self._list_entries_cache: Optional[List[Tuple[str, bool]]] = None
 
     # ----- データライフサイクル -------------------------------------------
     def load_initial(self, snapshots: List[UsbDeviceSnapshot]) -> None:
         self._update_state(snapshots, preserve_selection=False)
 
     def refresh(self) -> Tuple[List[UsbDeviceSnapshot], Optional[str]]:
-        snapshots, error = self._service.refresh()
-        self._last_error = error
-        self._update_state(snapshots, preserve_selection=True)
+        snapshots, error, com_ports = self.fetch()
+        self.apply(snapshots, error, com_ports)
         return snapshots, error
 
-    def _update_state(self, snapshots: List[UsbDeviceSnapshot], preserve_selection: bool) -> None:
+    def fetch(
+        self,
+    ) -> Tuple[List[UsbDeviceSnapshot], Optional[str], List[Dict[str, Optional[str]]]]:
+        """スキャンとCOMポート列挙だけを行い、状態は変更しない（ワーカースレッド用）。"""
+        snapshots, error = self._service.refresh()
+        # refresh() が並行して列挙した直後の結果を使い回す
+        return snapshots, error, ComPortManager.get_com_ports(ttl=_COM_PORTS_TTL)
+
+    def apply(
+        self,
+        snapshots: List[UsbDeviceSnapshot],
+        error: Optional[str],
+        com_ports: List[Dict[str, Optional[str]]],
+    ) -> None:
+        """fetch() の結果を状態へ反映する（UIスレッドから呼ぶ）。"""
+        self._last_error = error
+        self._update_state(snapshots, preserve_selection=True, com_ports=com_ports)
+
+    def _update_state(
+        self,
+        snapshots: List[UsbDeviceSnapshot],
+        preserve_selection: bool,
+        com_ports: Optional[List[Dict[str, Optional[str]]]] = None,
+    ) -> None:
         previous_key = None
         if preserve_selection and self.snapshots and self.selected_index < len(self.snapshots):
             previous_key = self.snapshots[self.selected_index].key()
 
         self.snapshots = [snap for snap in self._sort_snapshots(snapshots) if not snap.error]
-        self.com_ports = ComPortManager.get_com_ports()
+        # キー文字列は選択肢・選択復元で何度も使うので更新時に一度だけ組み立てる
+        self._options = [snapshot.key() for snapshot in self.snapshots]
+        key_index: Dict[str, int] = {}
+        for idx, key in enumerate(self._options):
+            # 線形走査時と同じく、同じキーでは先頭側を優先する
+            key_index.setdefault(key.lower(), idx)
+        self._key_index = key_index
+        self._list_entries_cache = None
+        self.com_ports = ComPortManager.get_com_ports(ttl=_COM_PORTS_TTL) if com_ports is None else com_ports
+        self._build_com_index()
+
+        self._precompute_enrichment()
 
         if previous_key:
             self.select_by_key(previous_key)
         else:
             self.selected_index = 0 if self.snapshots else -1
 
+    def _precompute_enrichment(self) -> None:
+        """表示用の派生文字列をスナップショットごとに一度だけ組み立てておく。
+
+        入れ子の多い詳細JSONは選択されたデバイス分だけ detail_json() で遅延生成する。
+        """
+        enriched: List[Dict[str, Any]] = []
+        for snapshot in self.snapshots:
+            identity = self._identity_without_vidpid(snapshot)
+            if snapshot.device_type == "ble":
+                enriched.append(
+                    {
+                        "identity": identity,
+                        "uuids_text": ", ".join(snapshot.ble_uuids) if snapshot.ble_uuids else "―",
+                    }
+                )
+                continue
+            vendor_label, product_label = snapshot.resolve_names(self._ids_db)
+            enriched.append(
+                {
+                    "identity": identity,
+                    "vendor_label": vendor_label,
+                    "product_label": product_label,
+                    "com_port_value": self._match_com_port(snapshot),
+                    "port_path_text": "-".join(str(p) for p in snapshot.port_path) if snapshot.port_path else "不明",
+                    "bus_text": str(snapshot.bus) if snapshot.bus is not None else "不明",
+                    "address_text": str(snapshot.address) if snapshot.address is not None else "不明",
+                    "hub_path": " -> ".join(snapshot.topology_chain) if snapshot.topology_chain else "未取得",
+                }
+            )
+        for snapshot, entry in zip(self.snapshots, enriched):
+            entry["info"] = self._build_info(snapshot, entry)
+        self._enriched = enriched
+
     def error_message(self) -> str:
         """スキャン時のエラーメッセージがあれば返す。"""
         return self._last_error or ""
@@ -57,7 +179,7 @@ class UsbDevicesViewModel:
         return len(self.snapshots)
 
     def get_options(self) -> List[str]:
-        return [snapshot.key() for snapshot in self.snapshots]
+        return list(self._options)
 
     def select_by_index(self, index: int) -> None:
         if not self.snapshots:
@@ -69,12 +191,7 @@ class UsbDevicesViewModel:
         if not self.snapshots:
             self.selected_index = -1
             return
-        key_lower = key.lower()
-        for idx, snapshot in enumerate(self.snapshots):
-            if snapshot.key().lower() == key_lower:
-                self.selected_index = idx
-                return
-        self.selected_index = 0
+        self.selected_index = self._key_index.get(key.lower(), 0)
 
     def current_snapshot(self) -> Optional[UsbDeviceSnapshot]:
         if not self.snapshots or self.selected_index < 0:
@@ -85,141 +202,121 @@ class UsbDevicesViewModel:
 
     # ----- 表示用派生データ ----------------------------------------------
     def info_values(self) -> Dict[str, str]:
-        snapshot = self.current_snapshot()
-        if snapshot is None:
+        if self.current_snapshot() is None:
             return {}
+        return self._enriched[self.selected_index]["info"]
 
-        identity = self._identity_without_vidpid(snapshot)
+    @staticmethod
+    def _build_info(snapshot: UsbDeviceSnapshot, enriched: Dict[str, Any]) -> Dict[str, str]:
+        """詳細欄に表示する項目を組み立てる（更新時に一度だけ呼ばれる）。"""
+        # 項目順と未設定値("―")はテンプレートに任せ、値のある項目だけを書き込む
+        info = _INFO_TEMPLATE.copy()
+        info["Identity"] = enriched["identity"]
+        info["Class Guess"] = snapshot.class_guess
         if snapshot.device_type == "ble":
-            uuids_text = ", ".join(snapshot.ble_uuids) if snapshot.ble_uuids else "―"
-            info = {
-                "VID": "―",
-                "usb.ids Vendor": "―",
-                "PID": "―",
-                "usb.ids Product": "―",
-                "Manufacturer": "―",
-                "Product": "―",
-                "Serial": "―",
-                "Identity": identity,
-                "Bus": "―",
-                "Address": "―",
-                "Port Path": "―",
-                "Class Guess": snapshot.class_guess,
-                "COMポート": "―",
-                "接続経路": "―",
-                "LocationInformation": "―",
-                "BLE Address": snapshot.ble_address or "―",
-                "BLE Name": snapshot.ble_name or "―",
-                "BLE RSSI": str(snapshot.ble_rssi) if snapshot.ble_rssi is not None else "―",
-                "BLE UUIDs": uuids_text,
-            }
+            info["BLE Address"] = snapshot.ble_address or "―"
+            info["BLE Name"] = snapshot.ble_name or "―"
+            info["BLE RSSI"] = str(snapshot.ble_rssi) if snapshot.ble_rssi is not None else "―"
+            info["BLE UUIDs"] = enriched["uuids_text"]
             return info
 
-        vendor_label, product_label = snapshot.resolve_names(self._ids_db)
-        port_path_text = "-".join(str(p) for p in snapshot.port_path) if snapshot.port_path else "不明"
-        bus_text = str(snapshot.bus) if snapshot.bus is not None else "不明"
-        address_text = str(snapshot.address) if snapshot.address is not None else "不明"
-        com_port_value = self._match_com_port(snapshot)
-        hub_path = " -> ".join(snapshot.topology_chain) if snapshot.topology_chain else "未取得"
-
-        info = {
-            "VID": snapshot.vid,
-            "usb.ids Vendor": vendor_label,
-            "PID": snapshot.pid,
-            "usb.ids Product": product_label,
-            "Manufacturer": snapshot.manufacturer or "―",
-            "Product": snapshot.product or "―",
-            "Serial": snapshot.serial or "―",
-            "Identity": identity,
-            "Bus": bus_text,
-            "Address": address_text,
-            "Port Path": port_path_text,
-            "Class Guess": snapshot.class_guess,
-            "COMポート": com_port_value or "情報なし",
-            "接続経路": hub_path,
-            "LocationInformation": snapshot.location_information or snapshot.location_fallback or "―",
-            "BLE Address": "―",
-            "BLE Name": "―",
-            "BLE RSSI": "―",
-            "BLE UUIDs": "―",
-        }
-
+        info["VID"] = snapshot.vid
+        info["usb.ids Vendor"] = enriched["vendor_label"]
+        info["PID"] = snapshot.pid
+        info["usb.ids Product"] = enriched["product_label"]
+        info["Manufacturer"] = snapshot.manufacturer or "―"
+        info["Product"] = snapshot.product or "―"
+        info["Serial"] = snapshot.serial or "―"
+        info["Bus"] = enriched["bus_text"]
+        info["Address"] = enriched["address_text"]
+        info["Port Path"] = enriched["port_path_text"]
+        info["COMポート"] = enriched["com_port_value"] or "情報なし"
+        info["接続経路"] = enriched["hub_path"]
+        info["LocationInformation"] = snapshot.location_information or snapshot.location_fallback or "―"
         return info
 
     def detail_json(self) -> str:
         snapshot = self.current_snapshot()
         if snapshot is None:
             return "{}"
-        return json.dumps(snapshot.to_dict(), ensure_ascii=False, indent=2)
+        entry = self._enriched[self.selected_index]
+        detail = entry.get("detail_json")
+        if detail is None:
+            detail = entry["detail_json"] = json_codec.dumps_pretty(snapshot.to_dict())
+        return detail
 
     def list_entries(self) -> List[Tuple[str, bool]]:
+        # 一覧の文字列は選択に依存しないので、次の更新まで同じリストを返す
+        if self._list_entries_cache is not None:
+            return self._list_entries_cache
+        com_devices = self._com_devices
+        is_usb_connected = self._service.is_usb_device_connected
         entries: List[Tuple[str, bool]] = []
-        for snapshot in self.snapshots:
+        for snapshot, enriched in zip(self.snapshots, self._enriched):
             if snapshot.device_type == "ble":
-                uuids_text = ", ".join(snapshot.ble_uuids) if snapshot.ble_uuids else "―"
                 item_text = (
                     f"[BLE] {snapshot.ble_name or '―'}\n"
                     f"Address: {snapshot.ble_address or '―'}\n"
                     f"RSSI: {snapshot.ble_rssi if snapshot.ble_rssi is not None else '―'}\n"
-                    f"UUIDs: {uuids_text}"
+                    f"UUIDs: {enriched['uuids_text']}"
                 )
                 entries.append((item_text, False))
                 continue
-            vendor_label, product_label = snapshot.resolve_names(self._ids_db)
-            com_port_value = self._match_com_port(snapshot)
-            port_connected = bool(
-                com_port_value
-                and any(port.get("device") == com_port_value for port in self.com_ports)
-            )
-            usb_connected = self._service.is_usb_device_connected(snapshot.vid, snapshot.pid, snapshot.serial)
+            com_port_value = enriched["com_port_value"]
+            port_connected = bool(com_port_value and com_port_value in com_devices)
+            usb_connected = is_usb_connected(snapshot.vid, snapshot.pid, snapshot.serial)
             dimmed = not (port_connected and usb_connected)
-            hub_path = " -> ".join(snapshot.topology_chain) if snapshot.topology_chain else "未取得"
-            identity = self._identity_without_vidpid(snapshot)
             item_text = (
-                f"{product_label or snapshot.product or '―'} / {snapshot.manufacturer or '―'}\n"
+                f"{enriched['product_label'] or snapshot.product or '―'} / {snapshot.manufacturer or '―'}\n"
                 f"  Raw Product: {snapshot.product or '―'}\n"
                 f"VID:PID {snapshot.vid}:{snapshot.pid}\n"
                 f"Serial: {snapshot.serial or '―'}\n"
-                f"ID: {identity}\n"
+                f"ID: {enriched['identity']}\n"
                 f"COM: {com_port_value or '情報なし'}\n"
                 f"Class: {snapshot.class_guess}\n"
-                f"接続経路: {hub_path}"
+                f"接続経路: {enriched['hub_path']}"
             )
             entries.append((item_text, dimmed))
+        self._list_entries_cache = entries
         return entries
 
     # ----- ユーティリティ ------------------------------------------------
+    def _build_com_index(self) -> None:
+        """COMポート一覧を (vid, pid, serial) / (vid, pid) キーの索引へ変換する。"""
+        com_index: Dict[Tuple[Any, Any, Any], Optional[str]] = {}
+        com_by_vidpid: Dict[Tuple[Any, Any], Optional[str]] = {}
+        for port in self.com_ports:
+            vid, pid = port.get("vid"), port.get("pid")
+            # 線形走査時と同じく、先に列挙されたポートを優先する
+            com_index.setdefault((vid, pid, port.get("serial_number")), port.get("device"))
+            com_by_vidpid.setdefault((vid, pid), port.get("device"))
+        self._com_index = com_index
+        self._com_by_vidpid = com_by_vidpid
+        self._com_devices = {port.get("device") for port in self.com_ports}
+
     def _match_com_port(self, snapshot: UsbDeviceSnapshot) -> Optional[str]:
         if snapshot.device_type != "usb":
             return None
-        for port in self.com_ports:
-            if (
-                port.get("vid") == snapshot.vid
-                and port.get("pid") == snapshot.pid
-                and (
-                    not snapshot.serial
-                    or port.get("serial_number") == snapshot.serial
-                )
-            ):
-                return port.get("device")
-        return None
+        if snapshot.serial:
+            return self._com_index.get((snapshot.vid, snapshot.pid, snapshot.serial))
+        return self._com_by_vidpid.get((snapshot.vid, snapshot.pid))
 
     @staticmethod
     def _sort_snapshots(snapshots: List[UsbDeviceSnapshot]) -> List[UsbDeviceSnapshot]:
-        def sort_key(snap: UsbDeviceSnapshot) -> Tuple[object, object, object, str]:
+        # キーを一度だけ組み立てて並べ替え、元の順序を添字で安定させる
+        id_value = UsbDevicesViewModel._id_sort_value
+        keyed: List[Tuple[Tuple[object, ...], int, UsbDeviceSnapshot]] = []
+        for position, snap in enumerate(snapshots):
             if snap.device_type == "ble":
-                label = snap.ble_address or snap.ble_name or ""
-                return (1, "", "", label)
-            return (
-                0,
-                UsbDevicesViewModel._id_sort_value(snap.vid),
-                UsbDevicesViewModel._id_sort_value(snap.pid),
-                "",
-            )
-
-        return sorted(snapshots, key=sort_key)
+                key: Tuple[object, ...] = (1, snap.ble_address or snap.ble_name or "")
+            else:
+                key = (0, id_value(snap.vid), id_value(snap.pid))
+            keyed.append((key, position, snap))
+        keyed.sort()
+        return [snap for _key, _position, snap in keyed]
 
     @staticmethod
+    @functools.lru_cache(maxsize=1024)
     def _id_sort_value(value: Any) -> Tuple[int, int, str]:
         if isinstance(value, int):
             return (0, value, format(value, "04x"))
@@ -233,10 +330,15 @@ class UsbDevicesViewModel:
             return (1, sys.maxsize, text)
 
     def selected_option(self) -> str:
-        snapshot = self.current_snapshot()
-        return snapshot.key() if snapshot else ""
+        if self.current_snapshot() is None:
+            return ""
+        return self._options[self.selected_index]
 
     @staticmethod
     def _identity_without_vidpid(snapshot: UsbDeviceSnapshot) -> str:
-        parts = [part for part in snapshot.identity().split(" | ") if not part.startswith("VIDPID:")]
-        return " | ".join(parts) if parts else snapshot.identity()
+        text = snapshot.identity()
+        # BLEなどVIDPID区間を含まない識別子は分割せずそのまま返す
+        if "VIDPID:" not in text:
+            return text
+        parts = [part for part in text.split(" | ") if not part.startswith("VIDPID:")]
+        return " | ".join(parts) if parts else text
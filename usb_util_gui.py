@@ -11,6 +11,8 @@ USB-util: USB/BTデバイス情報のスキャン・表示・保存・COMポー
 - 指定したVID:PIDのデバイスへシリアルコマンド送受信（pyserial）
 """
 
+from __future__ import annotations
+
 # 主な機能
 # - PyUSBでUSBデバイスの詳細情報取得
 # - usb.idsによるベンダー名・製品名補完
@@ -19,27 +21,40 @@ USB-util: USB/BTデバイス情報のスキャン・表示・保存・COMポー
 # - 権限不足/バックエンド未導入時のエラー表示
 
 import argparse
+import functools
+import logging
 import os
 import sys
 from pathlib import Path
 
-from typing import Any, Dict, List, Optional, Tuple
-
-import customtkinter as ctk
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
 
 import threading
 import time
 
 from core.com_ports import ComPortManager
-from core.bootstrap import setup_services as bootstrap_setup_services
+from core.bootstrap import build_services
 from core.device_models import UsbDeviceSnapshot, UsbSnapshotRepository, UsbSnapshotService
 from core.scanners import DeviceScanner
-from core.usb_ids import UsbIdsDatabase
+from core.usb_ids import UsbIdsDatabase, get_ids_database
 from ui.view_model import UsbDevicesViewModel
 
+if TYPE_CHECKING:  # pragma: no cover - GUI依存は実行時には遅延読み込みする
+    import customtkinter as ctk
+    from aist_guiparts.ui_base import BaseApp
+    from ui.device_list import VirtualDeviceList
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 USB_JSON_PATH = os.path.join(BASE_DIR, "usb_devices.json")
 _SERVICE_SINGLETON: Optional[UsbSnapshotService] = None
+# フォールバック再スキャンでも見つからなかった正規化済み (vid, pid, serial) と、その時刻
+_NEG_CACHE: Dict[Tuple[str, str, str], float] = {}
+_NEG_TTL = 2.0
+# 同時に取りこぼした呼び出し元どうしでフォールバック再スキャンを1回にまとめる
+_REFRESH_LOCK = threading.Lock()
+_LAST_REFRESH = 0.0
+
+logger = logging.getLogger(__name__)
 
 AILAB_ROOT = Path(__file__).resolve().parents[2]
 AK_GUIPARTS_ROOT = os.path.abspath(
@@ -48,15 +63,68 @@ AK_GUIPARTS_ROOT = os.path.abspath(
 if AK_GUIPARTS_ROOT not in sys.path and os.path.isdir(AK_GUIPARTS_ROOT):
     sys.path.insert(0, AK_GUIPARTS_ROOT)
 
-from aist_guiparts.ui_base import BaseApp  # noqa: E402
+
+# 画面レイアウトの余白とフォント。インスタンスごとに組み立て直さないようモジュール定数で持つ
+_UI_SPACING: Dict[str, Dict[str, Any]] = {
+    "layout": {
+        "root": (20, 20),             # ウィンドウ全体の外側マージン
+        "content_gap": (10, 5),      # 上部コントロールバーと下部エリアの間隔
+    },
+    "header": {
+        "pady": (0, 10),
+    },
+    "top_controls": {
+        "frame_padx": 10,             # 上部コントロールバーの左右余白
+        "frame_pady": (10, 5),        # 上部コントロールバーの上下余白
+        "title_padx": 10,             # タイトルラベルと左端の距離
+        "combo_padx": 20,             # コンボボックス左右余白
+        "button_padx": 10,            # 再読み込みボタン左右余白
+    },
+    "device_summary": {
+        "header_pad": (10, 0),        # 左ペイン見出しの余白
+        "frame_padx": 10,             # サマリーリスト左右余白
+        "frame_pady": 10,             # サマリーリスト上下余白
+        "item_padx": 6,               # サマリー項目枠の左右余白
+        "item_pady": 4,               # サマリー項目枠の上下余白
+        "label_padx": 8,              # サマリー項目テキスト左右余白
+        "label_pady": 6,              # サマリー項目テキスト上下余白
+    },
+    "device_info": {
+        "frame_padx": 10,             # デバイス情報/JSONペインの左右余白
+        "frame_pady": 10,             # デバイス情報/JSONペインの上下余白
+        "label_padx": (10, 6),        # 詳細ラベルと左端との距離
+        "value_padx": (0, 10),        # 詳細値と右端との距離
+        "row_pady": (0, 0),           # 詳細項目の行間
+        "error_pady": (8, 0),         # エラー表示の上下余白
+        "json_padx": 10,              # JSONテキストボックス左右余白
+        "json_pady": 10,              # JSONテキストボックス上下余白
+    },
+}
+
+_UI_FONTS: Dict[str, Any] = {
+    "scanning": ("Meiryo", 16, "bold"),
+    "top_controls": {"title": ("Meiryo", 20, "bold")},
+    "section_heading": ("Meiryo", 14, "bold"),
+    "device_summary": {"counter": ("Meiryo", 12)},
+    "device_info": {"label": ("Meiryo", 12, "bold"), "value": ("Meiryo", 12), "error": ("Meiryo", 11)},
+}
+
+
+def _import_gui_modules() -> None:
+    """CustomTkinter/Tk関連をGUI起動時に初めて読み込む（CLIやライブラリ利用では読み込まない）。"""
+    global ctk, BaseApp, VirtualDeviceList
+    import customtkinter as ctk
+    from aist_guiparts.ui_base import BaseApp
+    from ui.device_list import VirtualDeviceList
 
 
 class UsbDevicesApp:
     """Render USB device snapshots via CustomTkinter."""
 
     def __init__(self, view_model: UsbDevicesViewModel) -> None:
+        _import_gui_modules()
         self.view_model = view_model
-        print(f"[DEBUG] UsbDevicesApp initial snapshots count: {self.view_model.device_count()}")
+        logger.debug("UsbDevicesApp initial snapshots count: %d", self.view_model.device_count())
 
         self.app = BaseApp(theme="dark")
         self.app.title("AUTO Kobo USB Utility")
@@ -65,38 +133,59 @@ class UsbDevicesApp:
 
         self.combo: Optional[ctk.CTkComboBox] = None
         self.device_count_label: Optional[ctk.CTkLabel] = None
-        self.device_listbox: Optional[ctk.CTkScrollableFrame] = None
-        self.device_list_items: List[ctk.CTkFrame] = []
+        self.device_listbox: Optional[VirtualDeviceList] = None
         self.info_labels: Dict[str, ctk.CTkLabel] = {}
         self.error_label: Optional[ctk.CTkLabel] = None
         self.detail_box: Optional[ctk.CTkTextbox] = None
+        # 詳細欄に現在表示しているJSON文字列とラベル文字列（同じ内容なら再設定しない）
+        self._detail_text = ""
+        self._label_texts: Dict[Any, str] = {}
+        # 連続した再読み込み・選択操作をまとめるための保留フラグ
+        self._scan_running = False
+        self._rescan_pending = False
+        self._refresh_pending: Optional[Tuple[bool, bool]] = None
 
-        self._ui_spacing = self._spacing_config()
-        self._ui_fonts = self._font_config()
+        self._ui_spacing = _UI_SPACING
+        self._ui_fonts = self._build_fonts(_UI_FONTS)
 
         self._setup_layout()
-        self._show_scanning_indicator()
-        threading.Thread(target=self._background_initial_scan, daemon=True).start()
+        self._start_background_scan()
 
-    def _background_initial_scan(self):
-        self.view_model.refresh()
-        self.app.after(0, self._finish_scanning_indicator)
+    def _start_background_scan(self) -> None:
+        # スキャン中の再要求は1回分だけ覚えておき、完了後にまとめて再スキャンする
+        if self._scan_running:
+            self._rescan_pending = True
+            return
+        self._scan_running = True
+        self._show_scanning_indicator()
+        threading.Thread(target=self._background_scan, daemon=True).start()
+
+    def _background_scan(self) -> None:
+        # USB/BLE列挙はワーカースレッドで行い、状態反映はTkのメインスレッドへ渡す
+        result = self.view_model.fetch()
+        self.app.after(0, self._on_scan_finished, result)
+
+    def _on_scan_finished(self, result) -> None:
+        self.view_model.apply(*result)
+        self._scan_running = False
+        if self._rescan_pending:
+            # 完了前に再読み込みされた結果は古い可能性があるので、表示せずに取り直す
+            self._rescan_pending = False
+            self._start_background_scan()
+            return
+        self._finish_scanning_indicator()
 
     def _show_scanning_indicator(self):
         if self.device_listbox:
-            for item in self.device_list_items:
-                item.destroy()
-            self.device_list_items.clear()
+            already_blinking = getattr(self, "_scanning_label", None) is not None
             self._scanning_blink_state = True
-            self._scanning_label = ctk.CTkLabel(
-                self.device_listbox,
-                text="🔄 デバイス検索中... 🔄",
-                font=("Meiryo", 16, "bold"),
-                text_color="#FF8800"
+            self._scanning_label = self.device_listbox.show_message(
+                "🔄 デバイス検索中... 🔄",
+                font=self._ui_fonts["scanning"],
+                text_color="#FF8800",
             )
-            self._scanning_label.pack(pady=30)
-            self.device_list_items.append(self._scanning_label)
-            self._blink_scanning_label()
+            if not already_blinking:
+                self._blink_scanning_label()
 
     def _blink_scanning_label(self):
         # ブリンク（点滅）処理
@@ -112,57 +201,26 @@ class UsbDevicesApp:
     def _finish_scanning_indicator(self):
         # スキャン完了時にインジケータを消してリストを更新
         if hasattr(self, "_scanning_label") and self._scanning_label:
-            self._scanning_label.destroy()
             self._scanning_label = None
-        self._apply_view_model(update_combo=True, rebuild_list=True)
+            if self.device_listbox:
+                self.device_listbox.hide_message()
+        self._schedule_view_update(update_combo=True, rebuild_list=True)
 
     def run(self) -> None:
         self.app.mainloop()
 
-    def _spacing_config(self) -> dict:
-        return {
-            "layout": {
-                "root": (20, 20),             # ウィンドウ全体の外側マージン
-                "content_gap": (10, 5),      # 上部コントロールバーと下部エリアの間隔
-            },
-            "header": {
-                "pady": (0, 10),
-            },
-            "top_controls": {
-                "frame_padx": 10,             # 上部コントロールバーの左右余白
-                "frame_pady": (10, 5),        # 上部コントロールバーの上下余白
-                "title_padx": 10,             # タイトルラベルと左端の距離
-                "combo_padx": 20,             # コンボボックス左右余白
-                "button_padx": 10,            # 再読み込みボタン左右余白
-            },
-            "device_summary": {
-                "header_pad": (10, 0),        # 左ペイン見出しの余白
-                "frame_padx": 10,             # サマリーリスト左右余白
-                "frame_pady": 10,             # サマリーリスト上下余白
-                "item_padx": 6,               # サマリー項目枠の左右余白
-                "item_pady": 4,               # サマリー項目枠の上下余白
-                "label_padx": 8,              # サマリー項目テキスト左右余白
-                "label_pady": 6,              # サマリー項目テキスト上下余白
-            },
-            "device_info": {
-                "frame_padx": 10,             # デバイス情報/JSONペインの左右余白
-                "frame_pady": 10,             # デバイス情報/JSONペインの上下余白
-                "label_padx": (10, 6),        # 詳細ラベルと左端との距離
-                "value_padx": (0, 10),        # 詳細値と右端との距離
-                "row_pady": (0, 0),           # 詳細項目の行間
-                "error_pady": (8, 0),         # エラー表示の上下余白
-                "json_padx": 10,              # JSONテキストボックス左右余白
-                "json_pady": 10,              # JSONテキストボックス上下余白
-            },
-        }
-
-    def _font_config(self) -> dict:
-        return {
-            "top_controls": {"title": ("Meiryo", 20, "bold")},
-            "section_heading": ("Meiryo", 14, "bold"),
-            "device_summary": {"counter": ("Meiryo", 12)},
-            "device_info": {"label": ("Meiryo", 12, "bold"), "value": ("Meiryo", 12), "error": ("Meiryo", 11)},
-        }
+    @classmethod
+    def _build_fonts(cls, spec: Any) -> Any:
+        """フォント指定のタプルをスタイルごとに1つの CTkFont へ変換する（ウィジェット間で共有する）。"""
+        if isinstance(spec, dict):
+            return {key: cls._build_fonts(value) for key, value in spec.items()}
+        family, size, *styles = spec
+        return ctk.CTkFont(
+            family=family,
+            size=size,
+            weight="bold" if "bold" in styles else "normal",
+            slant="italic" if "italic" in styles else "roman",
+        )
 
     # ------------------------------------------------------------------ layout
     def _setup_layout(self) -> None:
@@ -232,7 +290,16 @@ class UsbDevicesApp:
         self.device_count_label = ctk.CTkLabel(header, text="(0)", font=summary_fonts["counter"])
         self.device_count_label.pack(side="right")
 
-        self.device_listbox = ctk.CTkScrollableFrame(parent, width=260, fg_color=("gray12", "gray18"))
+        self.device_listbox = VirtualDeviceList(
+            parent,
+            on_click=self._on_list_item_clicked,
+            fg_color=("gray12", "gray18"),
+            width=260,
+            item_padx=summary_spacing["item_padx"],
+            item_pady=summary_spacing["item_pady"],
+            label_padx=summary_spacing["label_padx"],
+            label_pady=summary_spacing["label_pady"],
+        )
         self.device_listbox.pack(
             fill="both",
             expand=True,
@@ -316,83 +383,83 @@ class UsbDevicesApp:
 
         self._update_detail_section()
 
-    def _rebuild_device_list(self) -> None:
-        if not self.device_listbox:
+    def _schedule_view_update(self, update_combo: bool = True, rebuild_list: bool = True) -> None:
+        """画面更新をアイドル時に1回へまとめる（保留中の要求とは必要な範囲を合算する）。"""
+        pending = self._refresh_pending
+        if pending is not None:
+            self._refresh_pending = (pending[0] or update_combo, pending[1] or rebuild_list)
             return
-        for item in self.device_list_items:
-            item.destroy()
-        self.device_list_items.clear()
+        self._refresh_pending = (update_combo, rebuild_list)
+        self.app.after_idle(self._flush_view_update)
 
-        snapshots = self.view_model.snapshots
-        if self.device_count_label:
-            self.device_count_label.configure(text=f"({len(snapshots)})")
+    def _flush_view_update(self) -> None:
+        pending = self._refresh_pending
+        self._refresh_pending = None
+        if pending is not None:
+            self._apply_view_model(*pending)
 
-        for index, snapshot in enumerate(snapshots):
-            self._add_device_list_item(index, snapshot)
-
-    def _add_device_list_item(self, index: int, snapshot: UsbDeviceSnapshot) -> None:
+    def _rebuild_device_list(self) -> None:
         if not self.device_listbox:
             return
-
-        item_frame = ctk.CTkFrame(self.device_listbox, corner_radius=8)
-        entries = self.view_model.list_entries()
-        if index < len(entries):
-            text, dimmed = entries[index]
-        else:
-            text, dimmed = (snapshot.key(), False)
-        if dimmed:
-            item_frame.configure(fg_color=("#9fd3ff", "#75b5f2"))
-        else:
-            item_frame.configure(fg_color=("#50a7ff", "#2b82d9"))
-        item_frame.pack(fill="x", padx=self._ui_spacing["device_summary"]["item_padx"], pady=self._ui_spacing["device_summary"]["item_pady"])
-
-        text_color = ("#1f3c66", "#0f2845") if dimmed else ("black", "black")
-        item_label = ctk.CTkLabel(item_frame, text=text, justify="left", anchor="w", text_color=text_color)
-        item_label.pack(fill="x", padx=self._ui_spacing["device_summary"]["label_padx"], pady=self._ui_spacing["device_summary"]["label_pady"])
-
-        item_label.bind("<Button-1>", lambda _event, idx=index: self._on_list_item_clicked(idx))
-        item_frame.bind("<Button-1>", lambda _event, idx=index: self._on_list_item_clicked(idx))
-
-        self.device_list_items.append(item_frame)
+        if self.device_count_label:
+            self.device_count_label.configure(text=f"({self.view_model.device_count()})")
+        self.device_listbox.set_items(self.view_model.list_entries())
 
     def _update_detail_section(self) -> None:
         selected = self.view_model.current_snapshot()
         if selected is None:
-            for label in self.info_labels.values():
-                label.configure(text=label.cget("text").split(":")[0] + ": ―")
-            if self.detail_box:
-                self.detail_box.delete("1.0", "end")
+            for key, label in self.info_labels.items():
+                self._set_label_text(label, f"{key}: ―")
+            self._set_detail_text("")
             if self.error_label:
-                self.error_label.configure(text="")
+                self._set_label_text(self.error_label, "")
             return
 
         details = self.view_model.info_values()
         for key, value in details.items():
-            if key in self.info_labels:
-                self.info_labels[key].configure(text=f"{key}: {value}")
+            label = self.info_labels.get(key)
+            if label is not None:
+                self._set_label_text(label, f"{key}: {value}")
 
-        if self.detail_box:
-            self.detail_box.delete("1.0", "end")
-            self.detail_box.insert("1.0", self.view_model.detail_json())
+        self._set_detail_text(self.view_model.detail_json())
 
         if self.error_label:
-            self.error_label.configure(text=self.view_model.error_message())
+            self._set_label_text(self.error_label, self.view_model.error_message())
+
+    def _set_label_text(self, label: ctk.CTkLabel, text: str) -> None:
+        # configure() は毎回Tclへの往復になるので、表示中の文字列と同じなら呼ばない
+        if self._label_texts.get(label) == text:
+            return
+        label.configure(text=text)
+        self._label_texts[label] = text
+
+    def _set_detail_text(self, text: str) -> None:
+        # Tkのテキストウィジェットは全文の削除・再挿入が重いので、内容が変わった時だけ差し替える。
+        # ユーザーが欄内を編集した場合(modifiedフラグ)は同じ内容でも書き戻す
+        if not self.detail_box:
+            return
+        if text == self._detail_text and not self.detail_box.edit_modified():
+            return
+        self.detail_box.delete("1.0", "end")
+        if text:
+            self.detail_box.insert("1.0", text)
+        self.detail_box.edit_modified(False)
+        self._detail_text = text
 
     def _on_list_item_clicked(self, index: int) -> None:
+        # 一覧の表示内容と選択肢は選択に依存しないので、コンボの選択値と詳細欄だけを更新する
         self.view_model.select_by_index(index)
-        self._apply_view_model(update_combo=True, rebuild_list=True)
+        selected = self.view_model.selected_option()
+        if self.combo and selected:
+            self.combo.set(selected)
+        self._schedule_view_update(update_combo=False, rebuild_list=False)
 
     def _on_selection_change(self, selected: str) -> None:
         self.view_model.select_by_key(selected)
-        self._apply_view_model(update_combo=False, rebuild_list=True)
+        self._schedule_view_update(update_combo=False, rebuild_list=False)
 
     def _reload_snapshots(self) -> None:
-        self._show_scanning_indicator()
-        threading.Thread(target=self._background_reload_scan, daemon=True).start()
-
-    def _background_reload_scan(self):
-        self.view_model.refresh()
-        self.app.after(0, self._finish_scanning_indicator)
+        self._start_background_scan()
 
 
 def _get_service_singleton() -> UsbSnapshotService:
@@ -400,10 +467,8 @@ def _get_service_singleton() -> UsbSnapshotService:
 
     global _SERVICE_SINGLETON
     if _SERVICE_SINGLETON is None:
-        scanner = DeviceScanner(ble_timeout=5.0)
-        repository = UsbSnapshotRepository(USB_JSON_PATH)
-        _SERVICE_SINGLETON = UsbSnapshotService(scanner, repository)
-    return _SERVICE_SINGLETO
+        _SERVICE_SINGLETON = build_services(USB_JSON_PATH)
+    return _SERVICE_SINGLETON
 
 
 def get_com_port_for_device(
@@ -428,18 +493,52 @@ def get_com_port_for_device(
         一致するCOMポート名。検出できなければNone。
     """
 
+    global _LAST_REFRESH
     service = _get_service_singleton()
+    # "0x0403" と "0403"、大文字小文字違いのシリアルを同じ組み合わせとして扱う
+    key = UsbDeviceSnapshot.normalize_ids(vid, pid, serial)
     port = service.get_com_port_for_device(vid, pid, serial, refresh=refresh)
     if port or refresh:
+        if port:
+            _NEG_CACHE.pop(key, None)
         return port
 
-    # 一度もスナップショットが保存されていないケースへのフォールバックとしてスキャン
-    service.refresh()
-    return service.get_com_port_for_device(vid, pid, serial, refresh=False)
+    # 直前の再スキャンでも見つからなかった組み合わせは、ポーリングで連続再スキャンしない
+    now = time.monotonic()
+    if now - _NEG_CACHE.get(key, float("-inf")) < _NEG_TTL:
+        return None
+
+    # 一度もスナップショットが保存されていないケースへのフォールバックとしてスキャン。
+    # ロック待ちの間に他スレッドが再スキャンを終えていれば、その結果を使う
+    with _REFRESH_LOCK:
+        if _LAST_REFRESH < now:
+            service.refresh()
+            _LAST_REFRESH = time.monotonic()
+    port = service.get_com_port_for_device(vid, pid, serial, refresh=False)
+    if port:
+        _NEG_CACHE.pop(key, None)
+    else:
+        _remember_not_found(key)
+    return port
+
+
+def _remember_not_found(key: Tuple[str, str, str]) -> None:
+    """見つからなかった組み合わせを記録する。期限切れの記録は追加のたびに捨てて肥大化を防ぐ。"""
+    now = time.monotonic()
+    expired = [entry for entry, found_at in list(_NEG_CACHE.items()) if now - found_at >= _NEG_TTL]
+    for entry in expired:
+        _NEG_CACHE.pop(entry, None)
+    _NEG_CACHE[key] = now
 
 
 def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     """CLI用の引数を定義し、与えられたargvからNamespaceを生成する。"""
+    return _build_parser().parse_args(argv)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_parser() -> argparse.ArgumentParser:
+    """引数定義は不変なので、パーサーはプロセス内で一度だけ組み立てる。"""
     parser = argparse.ArgumentParser(description="USB device viewer and identifier")
     parser.add_argument("vid", nargs="?", help="Vendor ID (e.g. 0x1234)")
     parser.add_argument("pid", nargs="?", help="Product ID (e.g. 0x5678)")
@@ -491,7 +590,7 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="環境診断を行い、検出したUSBスナップショットとCOMポート情報を表示する",
     )
-    return parser.parse_args(argv)
+    return parser
 
 
 def run_cli(service: UsbSnapshotService, ids_db: UsbIdsDatabase, args: argparse.Namespace) -> int:
@@ -508,9 +607,9 @@ def run_cli(service: UsbSnapshotService, ids_db: UsbIdsDatabase, args: argparse.
         return 1
 
     for entry in results:
-        snapshot: UsbDeviceSnapshot = entry["snapshot"]
-        identity = entry["identity"]
-        port_path = "-".join(map(str, entry["port_path"])) if entry["port_path"] else "-"
+        snapshot = entry.snapshot
+        identity = entry.identity
+        port_path = "-".join(map(str, entry.port_path)) if entry.port_path else "-"
         vendor_label, product_label = snapshot.resolve_names(ids_db)
         vendor_raw = snapshot.manufacturer.strip() if snapshot.manufacturer else "―"
         product_raw = snapshot.product.strip() if snapshot.product else "―"
@@ -518,12 +617,12 @@ def run_cli(service: UsbSnapshotService, ids_db: UsbIdsDatabase, args: argparse.
         product_display = product_label or "不明"
         print(f"Identity: {identity}")
         print(f"  VID:PID : {snapshot.vid}:{snapshot.pid}")
-        print(f"  Serial  : {entry['serial'] or '―'}")
+        print(f"  Serial  : {entry.serial or '―'}")
         print(f"  Vendor  : {vendor_display} (raw: {vendor_raw})")
         print(f"  Product : {product_display} (raw: {product_raw})")
         print(f"  PortPath: {port_path}")
         print(f"  Bus/Addr: {snapshot.bus}/{snapshot.address}")
-        print(f"  COM Port: {entry['com_port'] or '情報なし'}")
+        print(f"  COM Port: {entry.com_port or '情報なし'}")
         print("")
 
     if args.send:
@@ -600,7 +699,8 @@ def run_self_test(
     else:
         print("No snapshots available. USBデバイスが接続されているか確認してください。")
 
-    ports = ComPortManager.get_com_ports()
+    # 直前の service.refresh() が並行して列挙した結果を使い回す（再列挙しない）
+    ports = ComPortManager.get_com_ports(ttl=5.0)
     print("\n--- COM Ports ---")
     if not ports:
         print("検出されたCOMポートはありません。pyserialがインストール済みか確認してください。")
@@ -636,18 +736,26 @@ def run_gui(
 def main(argv: Optional[List[str]] = None) -> None:
     """CLI経路とGUI経路を切り替えつつ、USB情報ツールのエントリーポイントを提供する。"""
     args = parse_args(argv)
-    service, snapshots, scan_error = bootstrap_setup_services(USB_JSON_PATH)
-    ids_db = UsbIdsDatabase()
+    # スキャンは経路ごとに必要になった時点で行う
+    service = build_services(USB_JSON_PATH)
+    ids_db = get_ids_database()
 
     if args.self_test:
+        snapshots, scan_error = service.refresh()
         exit_code = run_self_test(service, snapshots, scan_error)
         sys.exit(exit_code)
 
     if args.vid and args.pid:
+        if not args.refresh:
+            # --refresh 指定時は run_cli 内で再スキャンするので二重に走らせない
+            _, scan_error = service.refresh()
+            if scan_error:
+                print(scan_error, file=sys.stderr)
         exit_code = run_cli(service, ids_db, args)
         sys.exit(exit_code)
 
-    run_gui(ids_db, service, snapshots)
+    # GUIは保存済みJSONで即座に描画し、最新スキャンは起動後にワーカースレッドで行う
+    run_gui(ids_db, service, service.load())
 
 
 if __name__ == "__main__":